@@ -1,500 +1,158 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import sys
 import io
 import os
-import random
+import json
+import contextvars
 from contextlib import redirect_stdout, redirect_stderr
 
 # Import the working scraping components
 try:
-    from main import get_html_with_human_behavior
-    from hackclub_ai import get_hackclub_ai
-    from langchain_core.messages import HumanMessage
-    from bs4 import BeautifulSoup
-    import re
-    import requests
-    import markdown
+    from structured_log import setup_logging, get_logger, new_request_id, request_id_var
+    from browser_pool import pool_stats
+    from async_browser import async_engine_stats
+    from readiness import readiness_stats
+    from domain_health import get_domain_health
+    from html_cache import get_html_cache
+    from article_store import get_article_store
+    from summarizer import process_markdown_to_html
+    import metrics
+    from summary_cache import get_summary_cache
+    from jobs import get_job_manager
+    from batch import HostLimiter, run_batch, extract_executor, BATCH_MAX_URLS
+    from pipeline import build_pipeline, RunContext, StageError, current_run
+    from extractor import ParsedPage
     import time
 except ImportError as e:
     print(f"Error: Could not import required modules: {e}")
     sys.exit(1)
 
+setup_logging()
+log = get_logger('app')
+
 app = Flask(__name__)
 
 # Production configuration for Render
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-render')
 app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
 
-def get_html_fallback(url):
-    """Universal enhanced fallback method using requests with multi-site strategies"""
-    print("🔄 Using universal enhanced requests fallback method...")
-    
-    # Universal user agents that work well across sites
-    universal_user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/119.0'
-    ]
-    
-    # Universal referer strategies that work across sites
-    domain = '/'.join(url.split('/')[:3])
-    site_name = domain.replace('https://', '').replace('http://', '').replace('www.', '')
-    
-    universal_referers = [
-        f'https://www.google.com/search?q={site_name.replace(".", "+")}',
-        f'https://www.google.co.in/search?q={site_name.replace(".", "+")}+news',
-        'https://www.bing.com/search?q=' + site_name.replace('.', '+'),
-        'https://duckduckgo.com/?q=' + site_name.replace('.', '+'),
-        f'{domain}/',
-        f'{domain}/latest',
-        f'{domain}/news',
-        'https://twitter.com/',
-        'https://facebook.com/',
-        ''  # No referer
-    ]
-    
-    # Advanced session configurations
-    session_configs = [
-        {
-            'timeout': 15,
-            'allow_redirects': True,
-            'verify': True,
-            'stream': False
-        },
-        {
-            'timeout': 20,
-            'allow_redirects': True,
-            'verify': False,
-            'stream': True
-        },
-        {
-            'timeout': 10,
-            'allow_redirects': False,
-            'verify': True,
-            'stream': False
-        }
-    ]
-    
-    # Try multiple strategies with enhanced headers
-    for attempt in range(len(universal_user_agents)):
-        for referer_idx, referer in enumerate(universal_referers):
-            for config_idx, config in enumerate(session_configs):
-                try:
-                    ua = universal_user_agents[attempt]
-                    
-                    # Enhanced headers that mimic real browser requests
-                    headers = {
-                        'User-Agent': ua,
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'cross-site' if referer else 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Cache-Control': 'max-age=0',
-                    }
-                    
-                    # Add Chrome-specific headers for Chrome user agents
-                    if 'Chrome' in ua:
-                        headers.update({
-                            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-                            'sec-ch-ua-mobile': '?0',
-                            'sec-ch-ua-platform': '"Windows"',
-                            'sec-ch-viewport-width': '1920',
-                            'sec-ch-viewport-height': '1080'
-                        })
-                    
-                    if referer:
-                        headers['Referer'] = referer
-                    
-                    print(f"🔄 Attempt {attempt+1}.{referer_idx+1}.{config_idx+1}: {ua.split()[0][:15]}... Ref: {referer[:30]}...")
-                    
-                    # Create session with realistic settings
-                    session = requests.Session()
-                    session.headers.update(headers)
-                    
-                    # Add realistic cookies for better compatibility
-                    session.cookies.update({
-                        'cookieconsent_status': 'dismiss',
-                        '_ga': f'GA1.2.{random.randint(100000000, 999999999)}.{int(time.time())}',
-                        '_gid': f'GA1.2.{random.randint(100000000, 999999999)}.{int(time.time())}',
-                    })
-                    
-                    # For certain sites, establish session via homepage first (like NDTV success)
-                    if referer_idx < 3 and any(site in url.lower() for site in ['ndtv.com', 'cnn.com', 'bbc.com']):
-                        try:
-                            print(f"🏠 Establishing session via {domain}...")
-                            homepage_response = session.get(domain, timeout=10)
-                            if homepage_response.status_code == 200:
-                                time.sleep(random.uniform(1, 2))
-                        except Exception as e:
-                            print(f"⚠️ Homepage visit failed: {e}")
-                    
-                    # Now request the actual article
-                    response = session.get(url, **config)
-                    
-                    if response.status_code == 200:
-                        content = response.text
-                        
-                        # Universal blocking detection
-                        content_lower = content.lower()
-                        block_indicators = [
-                            'access denied', 'forbidden', 'blocked', 'error 503', 'error 403',
-                            'edgesuite', 'akamai', 'cloudflare ray id', 'reference #18.',
-                            'your request has been blocked', 'access to this page has been denied',
-                            'service unavailable', 'temporarily unavailable', 'bot protection',
-                            'suspicious activity', 'verify you are human', 'captcha', 'recaptcha',
-                            'checking your browser', 'please wait while we verify', 'security check'
-                        ]
-                        
-                        if any(indicator in content_lower[:3000] for indicator in block_indicators):
-                            print(f"❌ Blocked content detected (indicator found), trying next strategy...")
-                            continue
-                        
-                        # Check content quality - adjust thresholds based on site
-                        min_length = 8000 if 'ndtv.com' in url else 5000
-                        decent_length = 3000 if 'ndtv.com' in url else 2000
-                        
-                        if len(content) > min_length:
-                            print(f"✅ Success with strategy {attempt+1}.{referer_idx+1}.{config_idx+1}! Got {len(content)} characters")
-                            return content
-                        elif len(content) > decent_length:
-                            # Double-check it's not an error page
-                            site_indicators = ['article', 'news', 'content', 'story', 'post']
-                            if any(indicator in content_lower for indicator in site_indicators):
-                                print(f"✅ Success (decent content) with strategy {attempt+1}.{referer_idx+1}.{config_idx+1}! Got {len(content)} characters")
-                                return content
-                            else:
-                                print(f"⚠️ Suspicious content ({len(content)} chars), trying next...")
-                        else:
-                            print(f"⚠️ Short content ({len(content)} chars), trying next...")
-                            
-                    elif response.status_code in [403, 503, 451, 429]:
-                        print(f"❌ HTTP {response.status_code} (blocked/rate limited), trying next strategy...")
-                        continue
-                    else:
-                        print(f"⚠️ HTTP {response.status_code}, trying next...")
-                        
-                except Exception as e:
-                    print(f"❌ Strategy {attempt+1}.{referer_idx+1}.{config_idx+1} failed: {e}")
-                    continue
-                
-                # Small delay between attempts to avoid rate limiting
-                time.sleep(random.uniform(0.5, 1.5))
-    
-    print("❌ All enhanced fallback strategies failed")
-    return None
-
-def process_markdown_to_html(text):
-    """Convert markdown text to HTML for proper display"""
-    try:
-        # Convert markdown to HTML with extensions
-        html = markdown.markdown(text, extensions=['nl2br', 'fenced_code', 'tables'])
-        return html
-    except Exception as e:
-        print(f"⚠️ Markdown processing failed: {e}")
-        # Enhanced fallback: basic formatting
-        text = text.replace('**', '<strong>').replace('**', '</strong>')
-        text = text.replace('*', '<em>').replace('*', '</em>')
-        
-        # Handle headers
-        text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-        text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
-        text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
-        
-        # Handle line breaks and paragraphs
-        text = text.replace('\n\n', '</p><p>')
-        text = f'<p>{text}</p>'
-        
-        # Clean up empty paragraphs
-        text = re.sub(r'<p>\s*</p>', '', text)
-        
-        return text
-
-def extract_and_summarize(url):
-    """Extract article and return title, content, and 1-minute summary - Render optimized"""
+# Fetch -> validate -> extract -> summarize -> render, stage executors from PIPELINE_EXECUTORS
+PIPELINE = build_pipeline()
+
+# Batches parse on a CPU-sized pool so a long reading list can't starve the fetches
+BATCH_PIPELINE = PIPELINE.with_executors(extract=extract_executor)
+
+def extract_and_summarize(url, progress=None, on_delta=None, host_limiter=None, pipeline=None):
+    """Extract article and return its stored id, title and 1-minute summary - Render optimized
+
+    progress, when given, is called with each stage name as the pipeline enters it;
+    on_delta receives the summary text as it streams from the model. The result
+    carries per-stage timings in seconds.
+    """
+    run = RunContext(on_delta=on_delta, host_limiter=host_limiter)
+    started = time.perf_counter()
+    result = contextvars.copy_context().run(_extract_and_summarize, url, progress, run, pipeline or PIPELINE)
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started)
+    result['timings'] = run.timings
+    return result
+
+def _extract_and_summarize(url, progress, run, pipeline):
+    """Body of extract_and_summarize: the pipeline with summary cache checks around it"""
+    current_run.set(run)
     try:
-        print(f"🔄 Processing: {url}")
-
-        # Check if we're being rate limited by NDTV specifically
-        if 'ndtv.com' in url.lower():
-            print("🎯 NDTV detected - checking for rate limiting...")
-            # Add a longer delay for NDTV to avoid rate limiting
-            time.sleep(random.uniform(2, 5))
-        
-        # Universal strategy: Try Playwright first, then enhanced fallback for ALL sites
-        html_content = None
-        
-        # For NDTV, use enhanced fallback first since it's proven to work better
-        if 'ndtv.com' in url.lower():
-            print("🎯 NDTV detected - using enhanced fallback method first...")
-            html_content = get_html_fallback(url)
-            
-            # If fallback fails, try Playwright as backup for NDTV
-            if not html_content:
-                print("🔄 NDTV fallback failed, trying Playwright as backup...")
-                try:
-                    html_content = get_html_with_human_behavior(url)
-                except Exception as e:
-                    print(f"❌ Playwright also failed for NDTV: {e}")
-        else:
-            # For all other sites: Try Playwright first, then enhanced fallback
-            print("🎭 Trying Playwright first...")
-            try:
-                html_content = get_html_with_human_behavior(url)
-                if html_content:
-                    print(f"✅ Playwright succeeded: {len(html_content)} characters")
-            except Exception as e:
-                print(f"❌ Playwright failed: {e}")
-                html_content = None
-            
-            # If Playwright failed or returned nothing, use enhanced fallback
-            if not html_content:
-                print("🔄 Falling back to enhanced anti-bot method...")
-                html_content = get_html_fallback(url)
-                if html_content:
-                    print(f"✅ Enhanced fallback succeeded: {len(html_content)} characters")
-
-        if not html_content:
-            # Special handling for NDTV rate limiting
-            if 'ndtv.com' in url.lower():
-                return {
-                    "error": "NDTV is currently blocking automated access due to rate limiting. This is because:\n"
-                            "• Multiple recent requests from the same IP address\n"
-                            "• NDTV's enhanced anti-bot protection (Akamai EdgeSuite)\n"
-                            "• Temporary IP-based blocking\n\n"
-                            "💡 Solutions:\n"
-                            "• Wait 10-15 minutes before trying again\n"
-                            "• Try accessing from a different network/location\n"
-                            "• Use a VPN if available\n"
-                            "• Try the article URL directly in a regular browser first\n\n"
-                            "The system will work normally once the rate limit expires."
-                }
-            return {"error": "Failed to access the article. The site might have strong anti-bot protection."}
-        
-        # Check for access denied, error pages, or blocked content
-        html_lower = html_content.lower()
-        error_indicators = [
-            'access denied', 'forbidden', 'blocked', 'error 403', 'error 503',
-            'service unavailable', 'temporarily unavailable', 'edgesuite',
-            'cloudflare', 'bot protection', 'captcha', 'verification required',
-            'your request has been blocked', 'access to this page has been denied'
-        ]
-        
-        if any(indicator in html_lower[:2000] for indicator in error_indicators):
-            print("🚫 Detected blocked/error page, trying enhanced bypass...")
-            
-            # Try fallback method if Playwright was used
-            if html_content and len(html_content) < 5000:  # Small response likely means error page
-                print("🔄 Trying requests fallback for bypass...")
-                fallback_content = get_html_fallback(url)
-                if fallback_content and len(fallback_content) > len(html_content):
-                    html_content = fallback_content
-                    print(f"✅ Fallback successful: {len(html_content)} characters")
-            
-            # Still blocked? Return specific error
-            html_lower_updated = html_content.lower()
-            if any(indicator in html_lower_updated[:2000] for indicator in error_indicators):
-                return {
-                    "error": "The website is blocking automated access. This could be due to:\n"
-                            "• Increased anti-bot protection\n"
-                            "• CDN/EdgeSuite restrictions\n"
-                            "• Temporary server issues\n\n"
-                            "Try again in a few minutes or use a different article URL."
-                }
-
-        # AI-powered content extraction
-        llm = get_hackclub_ai()
-
-        extraction_prompt = f"""Extract content from this news article: {url}
-
-        The HTML contains an article. Extract:
-        1. Article title (look for h1, h2, or meta og:title)
-        2. Main article content (look for article, div with content/story classes, or paragraph tags)
-
-        Only output Python code that sets 'title' and 'content' variables as strings.
-        """
-
-        response = llm.invoke([HumanMessage(content=extraction_prompt)])
-        generated_code = response.content.strip()
-
-        # Clean the generated code
-        generated_code = re.sub(r'<think>.*?</think>', '', generated_code, flags=re.DOTALL)
-        if '```python' in generated_code:
-            generated_code = generated_code.split('```python')[1].split('```')[0]
-        elif '```' in generated_code:
-            generated_code = generated_code.split('```')[1].split('```')[0]
-        generated_code = generated_code.strip()
-
-        # Execute the extraction
-        exec_namespace = {
-            'BeautifulSoup': BeautifulSoup,
-            'html_content': html_content,
-            'soup': BeautifulSoup(html_content, 'html.parser'),
-            'url': url
+        log.info("Processing article", extra={'url': url})
+
+        summary_cache = get_summary_cache()
+        article_store = get_article_store()
+        cached = summary_cache.get_by_url(url)
+        # Entries written before summaries had ids, or whose stored article has expired, are misses
+        if cached and cached.get('id') and article_store.get(cached['id']) is not None:
+            log.info("Summary cache hit", extra={'kind': 'url'})
+            metrics.CACHE_HITS.inc(kind='url')
+            return dict(cached, url=url, cache_hit=True)
+
+        article = pipeline.run(url, until='extract', progress=progress)
+
+        # Same article text already summarized under a different URL
+        cached = summary_cache.get_by_content(article.content)
+        if cached and cached.get('id'):
+            log.info("Summary cache hit", extra={'kind': 'content'})
+            metrics.CACHE_HITS.inc(kind='content')
+            if article_store.get(cached['id']) is None:
+                # The summary outlived its stored article; store the text again rather than re-summarize
+                record = article_store.put(url, cached['title'], article.content, cached['summary'])
+                cached = dict(cached, id=record.id)
+                summary_cache.put(url, article.content, cached)
+            else:
+                summary_cache.alias(url, cached)
+            return dict(cached, url=url, cache_hit=True)
+        metrics.CACHE_MISSES.inc()
+
+        # HTML is rendered when the summary page is viewed, not per request
+        summary = pipeline.run(article, start='compact', until='summarize', progress=progress)
+
+        # The article text stays compressed in the store; responses and the cache carry its id
+        record = article_store.put(url, summary.title, article.content, summary.summary)
+        result = {
+            "id": record.id,
+            "title": summary.title,
+            "summary": summary.summary,
         }
+        # Keyed on the extracted text, which is what get_by_content is asked with
+        summary_cache.put(url, article.content, result)
 
-        try:
-            exec(generated_code, exec_namespace)
-            title = exec_namespace.get('title', '')
-            content = exec_namespace.get('content', '')
-        except Exception as e:
-            print(f"⚠️ AI extraction failed: {e}")
-            title = ''
-            content = ''
-
-        # Enhanced fallback extraction with Wikipedia-specific handling
-        if len(str(content)) < 100:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            print("🔧 Using enhanced fallback extraction...")
-            
-            # Title extraction with multiple fallbacks
-            if not title:
-                # Wikipedia specific title
-                if 'wikipedia.org' in url.lower():
-                    wiki_title = soup.find('h1', class_='firstHeading')
-                    title = wiki_title.get_text().strip() if wiki_title else ''
-                
-                # General title fallbacks
-                if not title:
-                    title_tag = soup.find('title')
-                    h1_tag = soup.find('h1')
-                    og_title = soup.find('meta', property='og:title')
-                    
-                    title = (title_tag and title_tag.get_text().strip()) or \
-                           (h1_tag and h1_tag.get_text().strip()) or \
-                           (og_title and og_title.get('content', '')) or \
-                           "Article"
-            
-            # Content extraction with site-specific handling
-            content_text = ""
-            
-            # Wikipedia specific extraction
-            if 'wikipedia.org' in url.lower():
-                print("🌐 Detected Wikipedia, using specialized extraction...")
-                
-                # Get main content div
-                content_div = soup.find('div', id='mw-content-text')
-                if content_div:
-                    # Get all paragraphs in the main content
-                    paragraphs = content_div.find_all('p', recursive=True)
-                    content_paragraphs = []
-                    
-                    for p in paragraphs:
-                        text = p.get_text().strip()
-                        # Skip empty paragraphs and references
-                        if len(text) > 50 and not text.startswith('[') and 'cite' not in text.lower():
-                            content_paragraphs.append(text)
-                    
-                    content_text = ' '.join(content_paragraphs[:10])  # First 10 substantial paragraphs
-                    print(f"📝 Wikipedia extraction: {len(content_text)} characters")
-            
-            # General content extraction fallbacks
-            if len(content_text) < 100:
-                print("🔧 Using general content extraction...")
-                
-                # Try article tag first
-                article = soup.find('article')
-                if article:
-                    paragraphs = article.find_all('p')
-                    content_text = ' '.join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
-                
-                # Try main content areas
-                if len(content_text) < 100:
-                    content_selectors = [
-                        'div[class*="content"]',
-                        'div[class*="article"]', 
-                        'div[class*="story"]',
-                        'div[class*="text"]',
-                        'div[class*="body"]',
-                        'main',
-                        '.post-content',
-                        '.entry-content'
-                    ]
-                    
-                    for selector in content_selectors:
-                        content_divs = soup.select(selector)
-                        if content_divs:
-                            for div in content_divs:
-                                paragraphs = div.find_all('p')
-                                text = ' '.join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
-                                if len(text) > len(content_text):
-                                    content_text = text
-                            if len(content_text) > 100:
-                                break
-                
-                # Last resort: all paragraphs
-                if len(content_text) < 100:
-                    paragraphs = soup.find_all('p')
-                    content_text = ' '.join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
-            
-            content = content_text
-            print(f"📝 Final extraction: {len(content)} characters")
-
-        if len(str(content)) < 50:
-            return {"error": "Could not extract sufficient content from the article."}
-
-        # Generate 1-minute summary
-        summary_prompt = f"""Create a concise 1-minute summary of this article that captures the key points:
-
-        Title: {title}
-        Content: {content[:4000]}
-
-        Instructions:
-        - Write 2-3 short paragraphs that someone can read in about 1 minute
-        - Use **bold** for important terms and concepts
-        - Use clear, engaging language
-        - Focus on the most important information
-        - Make it informative and easy to understand
-
-        IMPORTANT: Write your response directly in markdown format. Do NOT wrap it in code blocks or use ```markdown tags.
-        
-        Example format:
-        **Key Point**: Description of the main issue or event.
+        return dict(result, url=url, cache_hit=False)
 
-        Second paragraph with more details and **important terms** highlighted.
-
-        Final paragraph with conclusions or implications.
-        """
-
-        summary_response = llm.invoke([HumanMessage(content=summary_prompt)])
-        summary_raw = re.sub(r'<think>.*?</think>', '', summary_response.content, flags=re.DOTALL).strip()
-        
-        # Clean up any code block wrapping that AI might add
-        if '```markdown' in summary_raw:
-            summary_raw = summary_raw.split('```markdown')[1].split('```')[0].strip()
-        elif summary_raw.startswith('```') and summary_raw.endswith('```'):
-            summary_raw = summary_raw[3:-3].strip()
-        
-        # Process markdown to HTML for proper display
-        summary_html = process_markdown_to_html(summary_raw)
-
-        return {
-            "title": title,
-            "content": content,
-            "summary": summary_raw,  # Keep raw for API
-            "summary_html": summary_html,  # HTML version for display
-            "url": url
-        }
+    except StageError as e:
+        metrics.ERRORS.inc(type=e.error_type)
+        return {"error": str(e)}
 
     except Exception as e:
+        metrics.ERRORS.inc(type='exception')
+        log.exception("Processing failed", extra={'url': url})
         return {"error": f"Processing failed: {str(e)}"}
 
+@app.before_request
+def bind_request_id():
+    new_request_id(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = request_id_var.get() or ''
+    return response
+
 @app.route('/')
 def home():
     """Homepage for Read It Now - Article Summarizer"""
     return render_template('index.html')
 
+def summary_payload(result):
+    """Shape an extract_and_summarize result into the /summarize response body"""
+    if 'error' in result:
+        return {'success': False, 'error': result['error']}
+
+    return {
+        'success': True,
+        'id': result['id'],
+        'summary_url': f"/summary/{result['id']}",
+        'title': result['title'],
+        'summary': result['summary'],
+        'url': result['url'],
+        'cache_hit': result['cache_hit'],
+        'timings': result.get('timings', {})
+    }
+
+def run_summary_job(url, progress, on_delta):
+    """Background job body: the full pipeline reporting progress and summary text to the job"""
+    return summary_payload(extract_and_summarize(url, progress=progress, on_delta=on_delta))
+
 @app.route('/summarize', methods=['POST'])
 def summarize():
-    """API endpoint to extract and summarize an article"""
+    """API endpoint to extract and summarize an article
+
+    With "async": true in the body (or ?async=1) the pipeline runs in the
+    background and a job id is returned at once.
+    """
     try:
         data = request.get_json()
         url = data.get('url')
@@ -502,33 +160,115 @@ def summarize():
         if not url:
             return jsonify({'success': False, 'error': 'URL is required'})
 
+        if data.get('async') or request.args.get('async') == '1':
+            job = get_job_manager().submit(url, run_summary_job)
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status_url': f'/jobs/{job.id}',
+                'events_url': f'/jobs/{job.id}/events'
+            }), 202
+
         # Extract and summarize the article
         result = extract_and_summarize(url)
 
-        if 'error' in result:
-            return jsonify({'success': False, 'error': result['error']})
-
-        return jsonify({
-            'success': True,
-            'title': result['title'],
-            'summary': result['summary'],
-            'summary_html': result['summary_html'],
-            'url': result['url']
-        })
+        return jsonify(summary_payload(result))
 
     except Exception as e:
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'})
 
+@app.route('/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """Summarize up to BATCH_MAX_URLS articles at once
+
+    Streams one NDJSON line per URL as soon as it finishes, fastest first.
+    Each line is the /summarize body plus the URL's position in the request.
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+
+    if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url for url in urls):
+        return jsonify({'success': False, 'error': 'A non-empty list of URLs is required'}), 400
+    if len(urls) > BATCH_MAX_URLS:
+        return jsonify({'success': False, 'error': f'At most {BATCH_MAX_URLS} URLs per batch'}), 400
+
+    host_limiter = HostLimiter()
+
+    def summarize_one(url):
+        return extract_and_summarize(url, host_limiter=host_limiter, pipeline=BATCH_PIPELINE)
+
+    def generate():
+        for index, url, result in run_batch(urls, summarize_one):
+            yield json.dumps(dict(summary_payload(result), index=index, url=url)) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a background summarization job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events for a job: progress stages, summary deltas, then done or failed"""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+
+    # Resume after the last event a reconnecting EventSource already saw
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+    return Response(
+        stream_with_context(manager.stream(job, start=start)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/summary')
 def summary():
-    """Display the article summary"""
+    """Display the article summary while its job runs"""
     return render_template('summary.html')
 
+@app.route('/summary/<article_id>')
+def stored_summary(article_id):
+    """Shareable summary page, rendered server-side from the article store"""
+    record = get_article_store().get(article_id)
+    if record is None:
+        return render_template('summary.html', error='This summary has expired or does not exist.'), 404
+    with metrics.timed('render'):
+        summary_html = process_markdown_to_html(record.summary)
+    return render_template('summary.html', article=record, summary_html=summary_html)
+
 @app.route('/health')
 def health():
     """Health check endpoint for Render"""
     return jsonify({'status': 'healthy', 'service': 'read-it-now'})
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms and pipeline counters"""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+@app.route('/pool')
+def browser_pool_stats():
+    """Browser pool and async engine stats, per-domain page readiness times, circuit breaker, HTML cache and article store state"""
+    return jsonify(dict(
+        pool_stats(),
+        async_engine=async_engine_stats(),
+        readiness=readiness_stats(),
+        domain_health=get_domain_health().stats(),
+        html_cache=get_html_cache().stats() if get_html_cache() else None,
+        article_store=get_article_store().stats()
+    ))
+
 @app.route('/debug', methods=['POST'])
 def debug_extraction():
     """Debug endpoint to test extraction without AI processing"""
@@ -539,28 +279,24 @@ def debug_extraction():
         if not url:
             return jsonify({'error': 'URL is required'})
         
-        # Get HTML content
-        html_content = None
-        try:
-            html_content = get_html_with_human_behavior(url)
-        except Exception as e:
-            print(f"❌ Playwright failed: {e}")
-            html_content = get_html_fallback(url)
+        # Get HTML content (fetch stage only; no block check, no summary)
+        run = RunContext()
+        current_run.set(run)
+        html_content = PIPELINE.run(url, until='fetch').html
 
         if not html_content:
             return jsonify({'error': 'Failed to fetch content'})
         
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Parse once and reuse the collected paragraph texts
+        page = ParsedPage(html_content)
         
         # Extract basic info
-        title = soup.find('title')
+        title = page.soup.find('title')
         title_text = title.get_text().strip() if title else 'No title'
         
         # Get page structure info
-        paragraphs = soup.find_all('p')
-        p_count = len(paragraphs)
-        total_text = ' '.join([p.get_text().strip() for p in paragraphs])
+        p_count = len(page.paragraphs)
+        total_text = ' '.join(text for _, text in page.paragraphs)
         
         return jsonify({
             'url': url,
@@ -569,7 +305,8 @@ def debug_extraction():
             'paragraph_count': p_count,
             'total_text_length': len(total_text),
             'sample_text': total_text[:500] + '...' if len(total_text) > 500 else total_text,
-            'is_wikipedia': 'wikipedia.org' in url.lower()
+            'is_wikipedia': 'wikipedia.org' in url.lower(),
+            'timings': run.timings
         })
         
     except Exception as e:
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from summary_cache import normalize_url, content_hash
+from structured_log import get_logger
+
+log = get_logger('article_store')
+
+
+# Records kept in memory per worker; the rest are read back from disk on demand
+ARTICLE_STORE_SIZE = int(os.environ.get('ARTICLE_STORE_SIZE', '512'))
+# How long a summary link keeps working
+ARTICLE_STORE_TTL = int(os.environ.get('ARTICLE_STORE_TTL', str(7 * 24 * 3600)))
+# Shared by every gunicorn worker on the host, so any of them can serve /summary/<id>
+ARTICLE_STORE_DB = os.environ.get('ARTICLE_STORE_DB') or os.path.join(
+    tempfile.gettempdir(), 'readitnow_articles.sqlite3'
+)
+
+# Expired rows are deleted at most this often, on put
+PRUNE_INTERVAL = 3600
+
+# zstd when the zstandard package is installed, zlib otherwise
+CODEC = 'zstd' if zstandard is not None else 'zlib'
+
+
+def _compress(text):
+    data = text.encode('utf-8')
+    if CODEC == 'zstd':
+        # Compressor objects are not thread-safe; a fresh one per call is cheap
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(blob, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(blob).decode('utf-8')
+    return zlib.decompress(blob).decode('utf-8')
+
+
+def article_id(url, content):
+    """Short stable id for an article: the same URL and text always get the same id"""
+    key = f'{normalize_url(url)}\n{content_hash(content)}'.encode('utf-8')
+    return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+class ArticleRecord:
+    """One summarized article; the text stays compressed until content is read"""
+
+    __slots__ = ('id', 'url', 'title', 'summary', 'created', '_content', '_codec')
+
+    def __init__(self, id, url, title, summary, content, codec, created):
+        self.id = sys.intern(id)
+        self.url = sys.intern(url)
+        self.title = title
+        self.summary = summary
+        self.created = created
+        self._content = content
+        self._codec = codec
+
+    @property
+    def content(self):
+        return _decompress(self._content, self._codec)
+
+    @property
+    def compressed_size(self):
+        return len(self._content)
+
+
+class ArticleStore:
+    """Summarized articles by id, behind shareable /summary/<id> links.
+
+    Records are written to SQLite and the most recently used ones are kept
+    in a bounded in-memory LRU; entries older than ttl stop resolving, and
+    are deleted from disk by the next put after PRUNE_INTERVAL.
+    """
+
+    def __init__(self, db_path=ARTICLE_STORE_DB, max_entries=ARTICLE_STORE_SIZE, ttl=ARTICLE_STORE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+        self._db = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS articles (id TEXT PRIMARY KEY, url TEXT NOT NULL, title TEXT NOT NULL, '
+            'summary TEXT NOT NULL, content BLOB NOT NULL, codec TEXT NOT NULL, created REAL NOT NULL)'
+        )
+        self._pruned_at = 0.0
+        self._prune()
+
+    def put(self, url, title, content, summary):
+        """Store a summarized article and return its record"""
+        record = ArticleRecord(article_id(url, content), url, title, summary, _compress(content), CODEC, time.time())
+        with self._lock:
+            self._remember(record)
+            if record.created - self._pruned_at >= PRUNE_INTERVAL:
+                self._prune()
+            self._db.execute(
+                'INSERT OR REPLACE INTO articles (id, url, title, summary, content, codec, created) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (record.id, record.url, record.title, record.summary, record._content, record._codec, record.created)
+            )
+            self._db.commit()
+        return record
+
+    def get(self, id):
+        """The record for id, or None when it is unknown or expired"""
+        expired_before = time.time() - self.ttl
+        with self._lock:
+            record = self._records.get(id)
+            if record is not None:
+                if record.created >= expired_before:
+                    self._records.move_to_end(id)
+                    return record
+                del self._records[id]
+
+            row = self._db.execute(
+                'SELECT id, url, title, summary, content, codec, created FROM articles '
+                'WHERE id = ? AND created >= ?', (id, expired_before)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[5] == 'zstd' and zstandard is None:
+                log.warning("Stored article needs zstandard to read", extra={'article_id': id})
+                return None
+            record = ArticleRecord(*row)
+            self._remember(record)
+            return record
+
+    def stats(self):
+        with self._lock:
+            return {
+                'records_in_memory': len(self._records),
+                'compressed_bytes_in_memory': sum(record.compressed_size for record in self._records.values()),
+                'codec': CODEC,
+            }
+
+    def _prune(self):
+        self._pruned_at = time.time()
+        deleted = self._db.execute('DELETE FROM articles WHERE created < ?', (self._pruned_at - self.ttl,)).rowcount
+        self._db.commit()
+        if deleted:
+            log.info("Pruned expired articles", extra={'deleted': deleted})
+
+    def _remember(self, record):
+        self._records[record.id] = record
+        self._records.move_to_end(record.id)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store():
+    """Process-wide article store configured from the environment"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore()
+    return _store
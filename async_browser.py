@@ -0,0 +1,241 @@
+import os
+import random
+import asyncio
+import atexit
+import threading
+import concurrent.futures
+
+from playwright.async_api import async_playwright
+
+from browser_pool import LAUNCH_ARGS, STEALTH_INIT_SCRIPT, stealth_context_options
+from resource_profiles import ResourceBlocker
+from readiness import config_for, wait_until_ready_async
+from block_detector import detect_block_title, BLOCK_STATUSES
+from html_cache import validators_from
+from structured_log import get_logger
+
+log = get_logger('async_browser')
+
+
+class _Generation:
+    """One launched browser and its shared contexts; retired after max pages, closed once idle"""
+
+    def __init__(self, browser, contexts):
+        self.browser = browser
+        self.contexts = contexts
+        self.next_context = 0
+        self.active = 0
+        self.served = 0
+        self.retired = False
+
+    def pick_context(self):
+        context = self.contexts[self.next_context % len(self.contexts)]
+        self.next_context += 1
+        return context
+
+
+class AsyncBrowserEngine:
+    """Browser fetches on playwright.async_api, all pages multiplexed on one event loop.
+
+    The loop runs on its own daemon thread; request threads submit fetches
+    with run_coroutine_threadsafe and wait on the returned future alongside
+    their other fetch legs. Up to max_pages pages are open at once across
+    shared contexts, so a waiting page costs a coroutine rather than an OS
+    thread.
+    """
+
+    def __init__(self, max_pages=16, contexts=4, max_pages_per_browser=200):
+        self.max_pages = max_pages
+        self.contexts = contexts
+        self.max_pages_per_browser = max_pages_per_browser
+        self._playwright = None
+        self._current = None
+        self._launches = 0
+        self._recycled = 0
+        self._in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='async-browser', daemon=True)
+        self._thread.start()
+        # Loop-bound primitives are created on the loop itself
+        self._slots, self._launch_lock = asyncio.run_coroutine_threadsafe(self._primitives(), self._loop).result()
+
+    async def _primitives(self):
+        return asyncio.Semaphore(self.max_pages), asyncio.Lock()
+
+    async def _acquire(self):
+        async with self._launch_lock:
+            generation = self._current
+            if generation is None or not generation.browser.is_connected() or generation.served >= self.max_pages_per_browser:
+                if generation is not None:
+                    generation.retired = True
+                    self._current = None
+                    self._recycled += 1
+                    await self._close_if_idle(generation)
+                generation = self._current = await self._launch()
+            generation.active += 1
+            generation.served += 1
+            return generation
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        contexts = []
+        for _ in range(self.contexts):
+            context = await browser.new_context(**stealth_context_options())
+            await context.add_init_script(STEALTH_INIT_SCRIPT)
+            contexts.append(context)
+        self._launches += 1
+        log.info(f"Async browser launched with {len(contexts)} shared contexts")
+        return _Generation(browser, contexts)
+
+    async def _release(self, generation):
+        generation.active -= 1
+        await self._close_if_idle(generation)
+
+    async def _close_if_idle(self, generation):
+        if generation.retired and generation.active == 0:
+            try:
+                await generation.browser.close()
+            except Exception:
+                pass
+
+    async def fetch(self, url, validators=None, refusals=None):
+        """HTML of url after a human-like visit, or None when the page looks blocked"""
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                generation = await self._acquire()
+                try:
+                    page = await generation.pick_context().new_page()
+                    try:
+                        return await _browse_like_human(page, url, validators, refusals)
+                    finally:
+                        try:
+                            await page.close()
+                        except Exception:
+                            pass
+                finally:
+                    await self._release(generation)
+            finally:
+                self._in_flight -= 1
+
+    def submit(self, url, validators=None, refusals=None):
+        """Start fetch() on the loop from any thread and return its concurrent.futures.Future.
+
+        The caller waits on the future itself, so a page in flight holds no
+        thread outside the loop; cancelling the future cancels the task, whose
+        finally closes the page.
+        """
+        return asyncio.run_coroutine_threadsafe(self.fetch(url, validators, refusals), self._loop)
+
+    def stats(self):
+        generation = self._current
+        return {
+            'engine': 'async',
+            'max_pages': self.max_pages,
+            'contexts': self.contexts,
+            'in_flight': self._in_flight,
+            'launches': self._launches,
+            'recycled': self._recycled,
+            'pages_on_browser': generation.served if generation else 0,
+        }
+
+    def shutdown(self):
+        async def close():
+            if self._current is not None:
+                try:
+                    await self._current.browser.close()
+                except Exception:
+                    pass
+            if self._playwright is not None:
+                await self._playwright.stop()
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout=10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+async def _mimic_human_browsing(page, url):
+    # Sites configured for it are entered through the homepage first (like a real user)
+    if config_for(url).warmup:
+        base_url = "/".join(url.split("/")[:3])
+        try:
+            await page.goto(base_url, wait_until='domcontentloaded', timeout=20000)
+            await page.mouse.move(random.randint(100, 800), random.randint(100, 600))
+            await page.evaluate("window.scrollTo(0, 200)")
+        except Exception as e:
+            log.warning(f"Homepage visit failed: {e}")
+
+    response = await page.goto(url, wait_until='domcontentloaded', timeout=20000)
+
+    # One human-like scroll so lazy-loaded article sections start loading
+    await page.mouse.move(random.randint(100, 1200), random.randint(100, 700))
+    await page.evaluate("window.scrollTo(0, 800)")
+    return response
+
+
+async def _browse_like_human(page, url, validators=None, refusals=None):
+    """Async twin of main._browse_like_human, without the NDTV Google detour"""
+    blocker = ResourceBlocker(url)
+    await page.route("**/*", blocker.handle_async)
+
+    response = await _mimic_human_browsing(page, url)
+    if refusals is not None and response is not None and response.status in BLOCK_STATUSES:
+        refusals.append(response.status)
+
+    # Return as soon as the main content has settled instead of sleeping a fixed time
+    await wait_until_ready_async(page, url)
+
+    html_content = await page.content()
+    title = await page.title()
+    log.debug(f"Page title: {title}")
+
+    block = detect_block_title(title)
+    if block:
+        log.warning(f"Still blocked with title: {title}", extra={'rule': block.rule})
+        return None
+
+    if validators is not None and response is not None:
+        validators.update(validators_from(response.headers))
+
+    log.info(f"Resources {blocker.summary()}", extra={'bytes_saved': blocker.bytes_saved})
+    log.info("Async Playwright fetch succeeded", extra={'chars': len(html_content)})
+    return html_content
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_async_engine():
+    """Process-wide async browser engine, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AsyncBrowserEngine(
+                    max_pages=int(os.environ.get('ASYNC_BROWSER_MAX_PAGES', '16')),
+                    contexts=int(os.environ.get('ASYNC_BROWSER_CONTEXTS', '4')),
+                    max_pages_per_browser=int(os.environ.get('BROWSER_MAX_PAGES', '50'))
+                )
+                atexit.register(_engine.shutdown)
+    return _engine
+
+
+def async_engine_stats():
+    """Engine stats without forcing it to start"""
+    if _engine is None:
+        return {'engine': 'async', 'started': False}
+    return dict(_engine.stats(), started=True)
+
+
+def submit_html_async(url, validators=None, refusals=None):
+    """Start an async-engine fetch of url; returns a concurrent.futures.Future for its HTML"""
+    try:
+        return get_async_engine().submit(url, validators=validators, refusals=refusals)
+    except Exception as e:
+        future = concurrent.futures.Future()
+        future.set_exception(e)
+        return future
@@ -0,0 +1,100 @@
+"""Micro-benchmark: block-page detection, old per-phrase scans vs block_detector.
+
+    python bench/bench_block_detector.py [--number N]
+
+The old fallback check lowercased the whole document and ran one `in` scan
+per phrase over its first 3000 characters; check_html did the same on a
+2000-character lowercased slice. Both are timed against detect_block, and a
+combined IGNORECASE regex over the same window is included for reference, on
+a clean article page, a large article page and a block page.
+"""
+import os
+import re
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from block_detector import detect_block, detect_block_title, PAGE_RULES  # noqa: E402
+
+OLD_FALLBACK_INDICATORS = [
+    'access denied', 'forbidden', 'blocked', 'error 503', 'error 403',
+    'edgesuite', 'akamai', 'cloudflare ray id', 'reference #18.',
+    'your request has been blocked', 'access to this page has been denied',
+    'service unavailable', 'temporarily unavailable', 'bot protection',
+    'suspicious activity', 'verify you are human', 'captcha', 'recaptcha',
+    'checking your browser', 'please wait while we verify', 'security check'
+]
+OLD_ERROR_INDICATORS = [
+    'access denied', 'forbidden', 'blocked', 'error 403', 'error 503',
+    'service unavailable', 'temporarily unavailable', 'edgesuite',
+    'cloudflare', 'bot protection', 'captcha', 'verification required',
+    'your request has been blocked', 'access to this page has been denied'
+]
+
+
+def old_fallback_check(html):
+    content_lower = html.lower()
+    return any(indicator in content_lower[:3000] for indicator in OLD_FALLBACK_INDICATORS)
+
+
+def old_check_html(html):
+    head = html[:2000].lower()
+    return any(indicator in head for indicator in OLD_ERROR_INDICATORS)
+
+
+COMBINED = re.compile('|'.join(re.escape(p) for phrases in PAGE_RULES.values() for p in phrases), re.IGNORECASE)
+
+
+def combined_regex(html):
+    return COMBINED.search(html, 0, 3000)
+
+
+def make_article(paragraphs):
+    head = ('<!DOCTYPE html><html><head><meta charset="utf-8"><title>City council approves budget</title>'
+            '<link rel="stylesheet" href="/static/site.css"><script src="/static/app.js"></script></head>'
+            '<body><header><nav><a href="/">Home</a> <a href="/world">World</a></nav></header><article><h1>City council approves budget</h1>')
+    body = ''.join(
+        f'<p>Paragraph {i}: the council debated the spending plan for several hours before the final vote, '
+        f'with members raising questions about transport, housing and school funding.</p>'
+        for i in range(paragraphs)
+    )
+    return head + body + '</article></body></html>'
+
+
+BLOCK_PAGE = ('<html><head><title>Access Denied</title></head><body><h1>Access Denied</h1>'
+              "You don't have permission to access this server.<p>Reference #18.2f7e3b17.1700000000.1a2b3c</p>"
+              '</body></html>')
+
+PAGES = {
+    'article_20KB': make_article(100),
+    'article_500KB': make_article(2500),
+    'block_page': BLOCK_PAGE,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000, help='calls per measurement')
+    args = parser.parse_args(argv)
+
+    phrases = sum(len(p) for p in PAGE_RULES.values())
+    print(f"{phrases} phrases in {len(PAGE_RULES)} rules; {args.number} calls per cell, best of 5\n")
+    print(f"{'page':<15}{'size':>10}{'old fallback':>15}{'old check_html':>16}{'combined regex':>16}{'detect_block':>14}  match")
+    for name, html in PAGES.items():
+        cells = []
+        for fn in (old_fallback_check, old_check_html, combined_regex, detect_block):
+            best = min(timeit.repeat(lambda: fn(html), number=args.number, repeat=5))
+            cells.append(best / args.number * 1e6)
+        match = detect_block(html)
+        print(f"{name:<15}{len(html):>10}{cells[0]:>13.1f}us{cells[1]:>14.1f}us{cells[2]:>14.1f}us{cells[3]:>12.1f}us  "
+              f"{match.rule + ':' + match.phrase if match else '-'}")
+
+    title = 'City council approves budget - Example News'
+    best = min(timeit.repeat(lambda: detect_block_title(title), number=args.number, repeat=5))
+    print(f"\ndetect_block_title: {best / args.number * 1e6:.2f}us per title")
+
+
+if __name__ == '__main__':
+    main()
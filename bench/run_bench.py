@@ -0,0 +1,273 @@
+"""Offline benchmark of the article pipeline over the saved pages in bench/corpus.
+
+    python bench/run_bench.py [--repeat N] [--save-baseline] [--threshold 0.25]
+
+Every corpus page goes through the real validate, extract, compact and
+render stages. Fetch reads the saved HTML (and flags block pages with the
+same check_html the live fetchers use) and summarize calls the real
+summarizer with a stub model, so no network or API key is involved.
+
+Reports per-stage p50/p95 latency, peak RSS and extraction quality (word
+overlap F1 against the page's .gold.txt). --save-baseline writes the
+numbers to bench/baseline.json; later runs compare against it and exit 1
+when a stage, peak RSS or quality regresses past the threshold.
+"""
+import os
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the bench's block-page failures out of the shared circuit breaker database
+os.environ.setdefault('DOMAIN_HEALTH_DB', os.path.join(tempfile.mkdtemp(prefix='readitnow-bench-'), 'health.sqlite3'))
+
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+
+from structured_log import setup_logging  # noqa: E402
+from fetcher import check_html  # noqa: E402
+from summarizer import summarize as summarize_article  # noqa: E402
+from pipeline import (  # noqa: E402
+    Pipeline, Stage, Summary, FetchedPage, RunContext, StageError, build_pipeline, current_run
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Latency changes smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_MS = 0.5
+# Allowed drop in a page's extraction F1 before it counts as a regression
+QUALITY_TOLERANCE = 0.02
+
+_WORD = re.compile(r'\w+')
+
+
+def load_corpus():
+    with open(os.path.join(CORPUS_DIR, 'manifest.json')) as f:
+        manifest = json.load(f)
+    pages = []
+    for entry in manifest:
+        with open(os.path.join(CORPUS_DIR, entry['name'] + '.html'), encoding='utf-8') as f:
+            entry['html'] = f.read()
+        gold_path = os.path.join(CORPUS_DIR, entry['name'] + '.gold.txt')
+        if os.path.exists(gold_path):
+            with open(gold_path, encoding='utf-8') as f:
+                entry['gold'] = f.read()
+        pages.append(entry)
+    return pages
+
+
+class StubLLM:
+    """Stands in for the chat model: answers at once with a fixed markdown summary"""
+
+    def _answer(self, messages):
+        prompt = messages[-1].content
+        return (
+            '<think>Reading the article.</think>\n'
+            '## Key points\n\n'
+            f'- The article is {len(prompt.split())} words of prompt.\n'
+            '- It covers the main events and their causes.\n\n'
+            '**Why it matters:** readers get the gist in a minute.'
+        )
+
+    def invoke(self, messages):
+        return AIMessage(content=self._answer(messages))
+
+    def stream(self, messages):
+        for piece in re.findall(r'\S+\s*', self._answer(messages)):
+            yield AIMessageChunk(content=piece)
+
+
+def build_bench_pipeline(pages):
+    """The standard pipeline with fetch served from the corpus and summarize on the stub model"""
+    html_by_url = {page['url']: page['html'] for page in pages}
+    llm = StubLLM()
+
+    def corpus_fetch_stage(url):
+        html = html_by_url.get(url)
+        usable, _ = check_html(html)
+        return FetchedPage(url, html, 'corpus', blocked=bool(html) and not usable)
+
+    def stub_summarize_stage(article):
+        summary = summarize_article(llm, article.title, article.content)
+        return Summary(article.url, article.title, article.content, summary)
+
+    replacements = {'fetch': corpus_fetch_stage, 'summarize': stub_summarize_stage}
+    return Pipeline(
+        Stage(stage.name, replacements.get(stage.name, stage.fn), stage.executor, stage.progress)
+        for stage in build_pipeline().stages
+    )
+
+
+def overlap_f1(extracted, gold):
+    """Bag-of-words F1 between extracted text and the gold article text"""
+    extracted_words = Counter(_WORD.findall(extracted.lower()))
+    gold_words = Counter(_WORD.findall(gold.lower()))
+    common = sum((extracted_words & gold_words).values())
+    if not common:
+        return 0.0
+    precision = common / sum(extracted_words.values())
+    recall = common / sum(gold_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_page(pipeline, page, samples):
+    """One pass of page through every stage; returns (extracted content, error_type)"""
+    run = RunContext()
+    token = current_run.set(run)
+    value, content = page['url'], None
+    try:
+        for stage in pipeline.stages:
+            started = time.perf_counter()
+            try:
+                value = pipeline.run(value, start=stage.name, until=stage.name)
+            finally:
+                samples.setdefault(stage.name, []).append((time.perf_counter() - started) * 1000)
+            if stage.name == 'extract':
+                content = value.content
+    except StageError as e:
+        return content, e.error_type
+    finally:
+        current_run.reset(token)
+    return content, None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_bench(repeat):
+    pages = load_corpus()
+    pipeline = build_bench_pipeline(pages)
+
+    # One untimed pass so imports, parser setup and tokenizer loading are not measured
+    for page in pages:
+        run_page(pipeline, page, {})
+
+    samples, quality, failures = {}, {}, []
+    for i in range(repeat):
+        for page in pages:
+            content, error_type = run_page(pipeline, page, samples)
+            if i:
+                continue
+            expected = page.get('expect_error')
+            if error_type != expected:
+                failures.append(f"{page['name']}: expected {expected or 'success'}, got {error_type or 'success'}")
+            elif 'gold' in page:
+                quality[page['name']] = round(overlap_f1(content or '', page['gold']), 4)
+
+    return {
+        'repeat': repeat,
+        'pages': len(pages),
+        'python': platform.python_version(),
+        'stages': {
+            name: {
+                'p50_ms': round(percentile(values, 50), 3),
+                'p95_ms': round(percentile(values, 95), 3),
+            }
+            for name, values in samples.items()
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'quality': quality,
+        'failures': failures,
+    }
+
+
+def compare(result, baseline, threshold):
+    """Human-readable regressions of result against baseline"""
+    regressions = []
+    for name, stats in result['stages'].items():
+        before = baseline.get('stages', {}).get(name)
+        if not before:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            limit = max(before[key] * (1 + threshold), before[key] + MIN_REGRESSION_MS)
+            if stats[key] > limit:
+                regressions.append(f"{name} {key}: {before[key]:.3f} -> {stats[key]:.3f}")
+
+    before_rss = baseline.get('peak_rss_mb')
+    if before_rss and result['peak_rss_mb'] > before_rss * (1 + threshold):
+        regressions.append(f"peak RSS: {before_rss} MB -> {result['peak_rss_mb']} MB")
+
+    for name, f1 in result['quality'].items():
+        before_f1 = baseline.get('quality', {}).get(name)
+        if before_f1 is not None and f1 < before_f1 - QUALITY_TOLERANCE:
+            regressions.append(f"{name} F1: {before_f1:.3f} -> {f1:.3f}")
+    return regressions
+
+
+def print_report(result, baseline):
+    print(f"{result['pages']} pages x {result['repeat']} runs, Python {result['python']}\n")
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'base p95':>10}")
+    for name, stats in result['stages'].items():
+        before = (baseline or {}).get('stages', {}).get(name, {}).get('p95_ms')
+        print(f"{name:<12}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+              f"{before if before is not None else '-':>10}")
+    print(f"\npeak RSS: {result['peak_rss_mb']} MB"
+          + (f" (baseline {baseline['peak_rss_mb']} MB)" if baseline else ''))
+    print(f"\n{'page':<32}{'F1':>8}{'base':>8}")
+    for name, f1 in result['quality'].items():
+        before = (baseline or {}).get('quality', {}).get(name)
+        print(f"{name:<32}{f1:>8.3f}{before if before is not None else '-':>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline pipeline benchmark over bench/corpus')
+    parser.add_argument('--repeat', type=int, default=20, help='timed passes over the corpus')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare with or save to')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed fractional slowdown / RSS growth before failing')
+    args = parser.parse_args(argv)
+
+    setup_logging('WARNING')
+    result = run_bench(args.repeat)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if result['failures']:
+        print('\nWrong outcome:\n  ' + '\n  '.join(result['failures']))
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressed beyond {args.threshold:.0%}:\n  " + '\n  '.join(regressions))
+        return 1
+    print('\nNo regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+
+BlockMatch = namedtuple('BlockMatch', ['rule', 'phrase', 'position'])
+
+# Phrases that mark an access-denied, rate-limit or bot-check page, grouped by rule.
+# CDN markers are the challenge-page texts, not the bare vendor names: those also
+# show up in ordinary <head> asset URLs (cdnjs.cloudflare.com, akamaihd.net).
+PAGE_RULES = {
+    'access_denied': ['access denied', 'access to this page has been denied', 'your request has been blocked'],
+    'forbidden': ['forbidden', 'error 403'],
+    'blocked': ['blocked'],
+    'unavailable': ['service unavailable', 'temporarily unavailable', 'error 503'],
+    'cdn_challenge': ['edgesuite', 'reference #18.', 'cloudflare ray id', 'attention required'],
+    'bot_check': [
+        'bot protection', 'suspicious activity', 'verify you are human', 'captcha',
+        'checking your browser', 'please wait while we verify', 'security check', 'verification required'
+    ],
+}
+
+# Words in a rendered page's <title> that mean the browser landed on a block or error page
+TITLE_RULES = {
+    'access_denied': ['access denied'],
+    'forbidden': ['forbidden'],
+    'blocked': ['blocked'],
+    'error': ['error'],
+    'unavailable': ['unavailable'],
+}
+
+# HTTP statuses a site answers with when it is refusing us rather than failing
+BLOCK_STATUSES = frozenset({403, 429, 503})
+
+# Block pages say so near the top; scanning further only finds article text about blocking
+PAGE_WINDOW = 3000
+
+
+class BlockDetector:
+    """Case-insensitive phrase matcher over the top of a page that reports which rule fired.
+
+    Only the scanned window is lowercased, once; each phrase is then a plain
+    substring search, which in CPython beats a combined regex (an alternation
+    under IGNORECASE is tried at every offset in the interpreter).
+    """
+
+    def __init__(self, rules):
+        self._phrases = tuple((rule, phrase.lower()) for rule, phrases in rules.items() for phrase in phrases)
+
+    def search(self, text, window=None):
+        """First BlockMatch, in rule order, within text[:window], else None"""
+        if not text:
+            return None
+        haystack = (text if window is None else text[:window]).lower()
+        for rule, phrase in self._phrases:
+            position = haystack.find(phrase)
+            if position != -1:
+                return BlockMatch(rule, phrase, position)
+        return None
+
+
+page_detector = BlockDetector(PAGE_RULES)
+title_detector = BlockDetector(TITLE_RULES)
+
+
+def detect_block(html, window=PAGE_WINDOW):
+    """BlockMatch when the top of html looks like a block/error page"""
+    return page_detector.search(html, window)
+
+
+def detect_block_title(title):
+    """BlockMatch when a page title reads like a block/error page"""
+    return title_detector.search(title)
@@ -0,0 +1,160 @@
+import os
+import re
+import threading
+from collections import Counter
+
+from structured_log import get_logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+log = get_logger('compaction')
+
+
+# Token cap on the article text handed to the summarizer; 0 sizes it to what the
+# map-reduce summarizer covers at its standard chunk size (see compact_stage)
+COMPACT_TOKEN_BUDGET = int(os.environ.get('COMPACT_TOKEN_BUDGET', '0'))
+# tiktoken encoding used to count tokens; close enough for the models we call
+TOKENIZER_ENCODING = os.environ.get('TOKENIZER_ENCODING', 'cl100k_base')
+# Paragraphs with at least this fraction of their word trigrams in a kept one are dropped
+NEAR_DUPLICATE_THRESHOLD = 0.9
+# Boilerplate rules only apply to paragraphs this short; long ones are real prose
+BOILERPLATE_MAX_CHARS = 220
+
+# Share bars, read-more links, captions and credits that ride along with article text
+BOILERPLATE = re.compile(
+    r'^(?:also read|read more|read also|related|recommended|more from|must read|trending|watch|listen)\b'
+    r'|^(?:advertisement|sponsored|story continues below|continue reading|skip to)\b'
+    r'|^(?:share (?:this|on)|follow us|click here|tap here|sign up|subscribe|download the)\b'
+    r'|^(?:photo|image|picture|video|file photo|caption|credit)s?\s*(?:credit)?\s*[:|-]'
+    r'|^(?:first published|published|updated|last updated)\s*(?:on|:)'
+    r'|\((?:getty images|reuters|ap|afp|pti|ani|file)\)\s*$'
+    r'|(?:all rights reserved|copyright ©|©\s*\d{4})'
+    r'|(?:whatsapp|telegram|google news)\s+(?:channel|group)',
+    re.IGNORECASE
+)
+
+_WORD = re.compile(r'\w+')
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The tiktoken encoding, or None when tiktoken or its BPE file is unavailable"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    # The BPE file is fetched on first use; offline hosts fall back to estimates
+                    _encoding_failed = True
+                    log.warning(f"Tokenizer unavailable ({e}), estimating tokens from length")
+    return _encoding
+
+
+def count_tokens(text):
+    """Tokens in text by the real tokenizer, or ~4 characters per token without it"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, budget):
+    """Longest prefix of text within budget tokens, ending on a word boundary"""
+    encoding = _get_encoding()
+    if encoding is None:
+        cut = text[:budget * 4]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= budget:
+            return text
+        cut = encoding.decode(tokens[:budget])
+    if len(cut) < len(text):
+        cut = cut.rsplit(' ', 1)[0]
+    return cut
+
+
+def _shingles(paragraph):
+    words = _WORD.findall(paragraph.lower())
+    if len(words) < 3:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+class _ShingleIndex:
+    """Shingles of the kept paragraphs, indexed so a new one is only compared with those it overlaps"""
+
+    def __init__(self):
+        self._postings = {}
+        self._count = 0
+
+    def is_near_duplicate(self, shingles):
+        """True when a kept paragraph already covers most of shingles.
+
+        Containment is measured against the new paragraph: a short dek kept
+        first doesn't make the longer body paragraph that repeats it a duplicate.
+        """
+        overlaps = Counter()
+        for shingle in shingles:
+            overlaps.update(self._postings.get(shingle, ()))
+        if not overlaps:
+            return False
+        return overlaps.most_common(1)[0][1] / len(shingles) >= NEAR_DUPLICATE_THRESHOLD
+
+    def add(self, shingles):
+        for shingle in shingles:
+            self._postings.setdefault(shingle, []).append(self._count)
+        self._count += 1
+
+
+def compact(text, budget=None):
+    """Article text made cheaper to send to the model.
+
+    Normalizes whitespace inside paragraphs, drops short boilerplate
+    paragraphs and near-duplicates (carousels and pull quotes repeat body
+    text), then keeps whole paragraphs in order until the token budget is
+    spent; the paragraph that crosses it is cut at a word boundary. With no
+    budget nothing is cut.
+    """
+    compacted, used = [], 0
+    index = _ShingleIndex()
+    dropped_boilerplate = dropped_duplicates = 0
+
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = ' '.join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= BOILERPLATE_MAX_CHARS and BOILERPLATE.search(paragraph):
+            dropped_boilerplate += 1
+            continue
+        shingles = _shingles(paragraph)
+        if index.is_near_duplicate(shingles):
+            dropped_duplicates += 1
+            continue
+
+        tokens = count_tokens(paragraph)
+        if budget and used + tokens > budget:
+            # Budget spent: the rest of the text is never sent, so it isn't deduplicated either
+            remaining = budget - used
+            if remaining > 20:
+                compacted.append(truncate_tokens(paragraph, remaining))
+            break
+        compacted.append(paragraph)
+        index.add(shingles)
+        used += tokens
+
+    result = '\n\n'.join(compacted)
+    log.info("Compacted article text", extra={
+        'chars_before': len(text),
+        'chars_after': len(result),
+        'boilerplate_dropped': dropped_boilerplate,
+        'duplicates_dropped': dropped_duplicates,
+    })
+    return result
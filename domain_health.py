@@ -0,0 +1,162 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+from summary_cache import normalize_url
+from structured_log import get_logger
+
+log = get_logger('domain_health')
+
+
+# Failures within CIRCUIT_WINDOW seconds that open a domain's circuit
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_WINDOW = int(os.environ.get('CIRCUIT_WINDOW', '300'))
+# How long an open circuit fails requests fast before one is let through as a probe
+CIRCUIT_COOLDOWN = int(os.environ.get('CIRCUIT_COOLDOWN', '600'))
+# Others keep failing fast this long while the probe request runs
+CIRCUIT_PROBE_SECONDS = 120
+# How long a URL that just failed keeps failing fast without a fetch
+NEGATIVE_CACHE_TTL = int(os.environ.get('NEGATIVE_CACHE_TTL', '300'))
+# Shared by every gunicorn worker on the host
+DOMAIN_HEALTH_DB = os.environ.get('DOMAIN_HEALTH_DB') or os.path.join(
+    tempfile.gettempdir(), 'readitnow_domain_health.sqlite3'
+)
+
+
+def _domain(url):
+    # The hostname, not the registrable domain: alice.github.io and bob.github.io are different sites
+    return (urlsplit(url).hostname or '').lower()
+
+
+class DomainHealth:
+    """Per-host circuit breaker and per-URL negative cache, kept in SQLite.
+
+    Each refused request (block page, NDTV rate limiting or a 403/429/503)
+    counts once against its host. CIRCUIT_FAILURE_THRESHOLD failures inside
+    the window open the circuit for the cooldown; after it, a single request
+    is let through as a probe that closes the circuit on success or reopens
+    it on failure. The failing URL itself is also remembered for
+    NEGATIVE_CACHE_TTL seconds.
+    """
+
+    def __init__(self, db_path=DOMAIN_HEALTH_DB, threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 window=CIRCUIT_WINDOW, cooldown=CIRCUIT_COOLDOWN, negative_ttl=NEGATIVE_CACHE_TTL):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS domains (domain TEXT PRIMARY KEY, failures INTEGER NOT NULL, '
+            'window_start REAL NOT NULL, open_until REAL NOT NULL, reason TEXT)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS failed_urls (url TEXT PRIMARY KEY, reason TEXT NOT NULL, expires REAL NOT NULL)'
+        )
+        self._db.execute('DELETE FROM failed_urls WHERE expires < ?', (time.time(),))
+        self._db.commit()
+
+    def check(self, url):
+        """('negative_cache' | 'circuit_open', error_type) when url should fail fast, else None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT reason FROM failed_urls WHERE url = ? AND expires > ?', (normalize_url(url), now)
+            ).fetchone()
+            if row:
+                return 'negative_cache', row[0]
+            domain = _domain(url)
+            row = self._db.execute(
+                'SELECT failures, open_until, reason FROM domains WHERE domain = ?', (domain,)
+            ).fetchone()
+            if not row or row[0] < self.threshold:
+                return None
+            failures, open_until, reason = row
+            if open_until > now:
+                return 'circuit_open', reason
+            # Cooldown over: exactly one request (across workers) becomes the probe
+            cursor = self._db.execute(
+                'UPDATE domains SET open_until = ? WHERE domain = ? AND open_until = ?',
+                (now + CIRCUIT_PROBE_SECONDS, domain, open_until)
+            )
+            self._db.commit()
+        if cursor.rowcount:
+            log.info("Circuit half-open, probing", extra={'domain': domain})
+            return None
+        return 'circuit_open', reason
+
+    def record_failure(self, url, reason):
+        """Count a blocked or failed fetch against the URL's domain and remember the URL"""
+        now = time.time()
+        domain = _domain(url)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO failed_urls (url, reason, expires) VALUES (?, ?, ?)',
+                (normalize_url(url), reason, now + self.negative_ttl)
+            )
+            row = self._db.execute(
+                'SELECT failures, window_start, open_until FROM domains WHERE domain = ?', (domain,)
+            ).fetchone()
+            failures, window_start, open_until = row or (0, now, 0.0)
+            if failures >= self.threshold:
+                pass  # the half-open probe failed: reopen straight away
+            elif now - window_start > self.window:
+                failures, window_start = 0, now
+            failures += 1
+            if failures >= self.threshold:
+                open_until = now + self.cooldown
+                log.warning("Circuit opened", extra={'domain': domain, 'reason': reason, 'cooldown': self.cooldown})
+            self._db.execute(
+                'INSERT OR REPLACE INTO domains (domain, failures, window_start, open_until, reason) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (domain, failures, window_start, open_until, reason)
+            )
+            self._db.commit()
+
+    def record_success(self, url):
+        """A usable page came back: close the domain's circuit and forget its failures"""
+        domain = _domain(url)
+        with self._lock:
+            # Healthy domains have no row, so the common case is a read, not a write
+            if not self._db.execute('SELECT 1 FROM domains WHERE domain = ?', (domain,)).fetchone():
+                return
+            self._db.execute('DELETE FROM domains WHERE domain = ?', (domain,))
+            self._db.commit()
+        log.info("Circuit closed", extra={'domain': domain})
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute('SELECT domain, failures, open_until, reason FROM domains').fetchall()
+            negative = self._db.execute('SELECT COUNT(*) FROM failed_urls WHERE expires > ?', (now,)).fetchone()[0]
+        return {
+            'domains': {
+                domain: {
+                    'failures': failures,
+                    'open': open_until > now,
+                    'retry_in_seconds': max(0, round(open_until - now)),
+                    'reason': reason,
+                }
+                for domain, failures, open_until, reason in rows
+            },
+            'negative_cached_urls': negative,
+        }
+
+
+_health = None
+_health_lock = threading.Lock()
+
+
+def get_domain_health():
+    """Process-wide handle on the shared domain health database"""
+    global _health
+    if _health is None:
+        with _health_lock:
+            if _health is None:
+                _health = DomainHealth()
+    return _health
@@ -0,0 +1,125 @@
+import os
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from extractor import extract_article
+from structured_log import get_logger
+
+log = get_logger('extraction_pool')
+
+
+def _available_cores():
+    try:
+        return len(os.sched_getaffinity(0))  # respects container CPU pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Worker processes for parsing; 0 keeps extraction on the request thread. On a
+# single core there is no parallelism to win back, only IPC cost, so default off
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS') or (_available_cores() if _available_cores() > 1 else 0))
+# Recycle a worker after this many pages so lxml/bs4 heap growth is returned to the OS
+EXTRACTION_MAX_TASKS = int(os.environ.get('EXTRACTION_MAX_TASKS', '200'))
+# Pages at least this large travel through shared memory instead of the result pipe
+EXTRACTION_SHM_BYTES = int(os.environ.get('EXTRACTION_SHM_BYTES', str(256 * 1024)))
+
+
+def _extract_bytes(data, url):
+    return extract_article(data.decode('utf-8', errors='replace'), url)
+
+
+def _extract_shared(name, size, url):
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # doesn't take ownership; the parent unlinks the segment once we return
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        html = bytes(segment.buf[:size]).decode('utf-8', errors='replace')
+    finally:
+        segment.close()
+    return extract_article(html, url)
+
+
+class ExtractionPool:
+    """Runs parse-and-extract in worker processes so concurrent requests don't share one GIL.
+
+    HTML goes in as UTF-8 bytes (through a shared memory segment for large
+    pages) and only the (title, content) strings come back. Workers are
+    spawned, not forked, because the parent runs browser and HTTP threads.
+    """
+
+    def __init__(self, workers=EXTRACTION_WORKERS, max_tasks_per_child=EXTRACTION_MAX_TASKS,
+                 shm_threshold=EXTRACTION_SHM_BYTES):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.shm_threshold = shm_threshold
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        max_tasks_per_child=self.max_tasks_per_child or None
+                    )
+        return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, url, html):
+        """(title, content) for the page, parsed in a worker process"""
+        data = html.encode('utf-8', errors='replace')
+        executor = self._get_executor()
+        segment = None
+        try:
+            if len(data) >= self.shm_threshold:
+                segment = shared_memory.SharedMemory(create=True, size=len(data))
+                segment.buf[:len(data)] = data
+                future = executor.submit(_extract_shared, segment.name, len(data), url)
+            else:
+                future = executor.submit(_extract_bytes, data, url)
+            return future.result()
+        except BrokenProcessPool as e:
+            # A worker died (OOM kill, segfault in a parser); start fresh and parse this page here
+            log.warning(f"Extraction pool broken ({e}), extracting inline")
+            self._reset(executor)
+            return extract_article(html, url)
+        finally:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool():
+    """Process-wide extraction pool, or None when EXTRACTION_WORKERS=0 or inside a worker process.
+
+    A stage already running in a process-pool worker (PIPELINE_EXECUTORS
+    extract=process) parses inline rather than spawning a pool of its own.
+    """
+    global _pool
+    if EXTRACTION_WORKERS <= 0 or multiprocessing.parent_process() is not None:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ExtractionPool()
+    return _pool
@@ -0,0 +1,264 @@
+import re
+import math
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+from structured_log import get_logger
+
+log = get_logger('extractor')
+
+
+# Class/id hints used to weight candidate containers
+POSITIVE_HINTS = re.compile(
+    r'article|body|content|entry|main|page|post|story|text|blog|prose', re.I
+)
+NEGATIVE_HINTS = re.compile(
+    r'comment|footer|footnote|masthead|meta|nav|outbrain|taboola|promo|related|share|'
+    r'sidebar|sponsor|social|widget|advert|subscribe|newsletter|menu|breadcrumb|cookie|'
+    r'popup|modal|caption|byline|tags', re.I
+)
+
+# Starting score for a candidate container by tag; <article>/<main> get the bonus
+TAG_WEIGHTS = {
+    'article': 25,
+    'main': 20,
+    'section': 5,
+    'div': 5,
+    'td': 3,
+    'blockquote': 3,
+    'pre': 3,
+    'form': -5,
+    'ul': -5,
+    'ol': -5,
+    'li': -5,
+    'aside': -20,
+    'nav': -25,
+    'header': -10,
+    'footer': -25,
+}
+
+MIN_PARAGRAPH_LENGTH = 25
+
+# Containers tried by the fallback extraction, most specific first
+CONTENT_SELECTORS = [
+    'div[class*="content"]',
+    'div[class*="article"]',
+    'div[class*="story"]',
+    'div[class*="text"]',
+    'div[class*="body"]',
+    'main',
+    '.post-content',
+    '.entry-content'
+]
+
+
+class ParsedPage:
+    """One parse of a document shared by every extraction stage.
+
+    The tree is built once with the fastest available backend, and the text
+    of every <p> is collected once so heuristics never call get_text() again.
+    """
+
+    __slots__ = ('soup', 'paragraphs', '_text_by_node')
+
+    def __init__(self, html):
+        self.soup = BeautifulSoup(html, PARSER)
+        self.paragraphs = []
+        self._text_by_node = {}
+        for node in self.soup.find_all('p'):
+            text = ' '.join(node.get_text().split())
+            self.paragraphs.append((node, text))
+            self._text_by_node[id(node)] = text
+
+    def paragraph_texts(self, root=None, min_length=20):
+        """Texts of the paragraphs under root (or the whole page) longer than min_length"""
+        if root is None:
+            return [text for _, text in self.paragraphs if len(text) > min_length]
+        texts = []
+        for node in root.find_all('p'):
+            text = self._text_by_node.get(id(node))
+            if text is not None and len(text) > min_length:
+                texts.append(text)
+        return texts
+
+
+def _class_weight(node):
+    """+25/-25 depending on what the node's class and id suggest"""
+    weight = 0
+    hints = ' '.join(node.get('class') or []) + ' ' + (node.get('id') or '')
+    if not hints.strip():
+        return weight
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    return weight
+
+
+def extract_title(soup):
+    """Best title for the page: og:title, then the first <h1>, then <title>"""
+    og_title = soup.find('meta', property='og:title')
+    if og_title and og_title.get('content', '').strip():
+        return og_title['content'].strip()
+
+    h1_tag = soup.find('h1')
+    if h1_tag and h1_tag.get_text().strip():
+        return ' '.join(h1_tag.get_text().split())
+
+    title_tag = soup.find('title')
+    if title_tag and title_tag.get_text().strip():
+        return title_tag.get_text().strip()
+
+    return ''
+
+
+def readability_extract(page):
+    """Deterministic main-content extraction, no LLM involved.
+
+    Makes one pass over the page's paragraphs, crediting each
+    paragraph's parent and grandparent with a score built from text density
+    (length, commas) and paragraph clustering, then discounts candidates by
+    link density. The best container and its strong siblings are returned as
+    (title, content).
+    """
+    soup = page.soup
+    candidates = {}   # id(node) -> [node, score, text_chars, link_chars, paragraph_count]
+    paragraphs = []   # (node, text, link_chars)
+
+    for node, text in page.paragraphs:
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        link_chars = sum(len(a.get_text()) for a in node.find_all('a'))
+        paragraphs.append((node, text, link_chars))
+
+        score = 1 + text.count(',') + min(len(text) / 100, 3)
+        for depth, ancestor in enumerate((node.parent, node.parent.parent if node.parent else None)):
+            if ancestor is None or ancestor.name in (None, '[document]', 'html', 'body'):
+                break
+            entry = candidates.get(id(ancestor))
+            if entry is None:
+                entry = [ancestor, TAG_WEIGHTS.get(ancestor.name, 0) + _class_weight(ancestor), 0, 0, 0]
+                candidates[id(ancestor)] = entry
+            entry[1] += score if depth == 0 else score / 2
+            entry[2] += len(text)
+            entry[3] += link_chars
+            entry[4] += 1
+
+    if not candidates:
+        return extract_title(soup), ''
+
+    def final_score(entry):
+        _, score, text_chars, link_chars, count = entry
+        link_density = link_chars / text_chars if text_chars else 1
+        # Several substantial paragraphs together beat one long blob
+        return score * (1 - link_density) * (1 + math.log(count) / 4)
+
+    scored = {key: final_score(entry) for key, entry in candidates.items()}
+    top_key = max(scored, key=scored.get)
+    top = candidates[top_key][0]
+
+    # Siblings that also look like content (e.g. split article bodies)
+    threshold = max(10, scored[top_key] * 0.2)
+    keep = {id(top)}
+    if top.parent is not None:
+        for sibling in top.parent.find_all(recursive=False):
+            if scored.get(id(sibling), 0) >= threshold:
+                keep.add(id(sibling))
+
+    content_paragraphs = []
+    for node, text, link_chars in paragraphs:
+        if link_chars / len(text) > 0.5:
+            continue
+        if any(id(ancestor) in keep for ancestor in node.parents):
+            content_paragraphs.append(text)
+
+    return extract_title(soup), '\n\n'.join(content_paragraphs)
+
+
+def fallback_extract(page, url, title=''):
+    """Site-specific and selector-based extraction used when readability finds too little"""
+    soup = page.soup
+    log.info("Using enhanced fallback extraction")
+
+    # Title extraction with multiple fallbacks
+    if not title:
+        # Wikipedia specific title
+        if 'wikipedia.org' in url.lower():
+            wiki_title = soup.find('h1', class_='firstHeading')
+            title = wiki_title.get_text().strip() if wiki_title else ''
+
+        # General title fallbacks
+        if not title:
+            title_tag = soup.find('title')
+            h1_tag = soup.find('h1')
+            og_title = soup.find('meta', property='og:title')
+
+            title = (title_tag and title_tag.get_text().strip()) or \
+                   (h1_tag and h1_tag.get_text().strip()) or \
+                   (og_title and og_title.get('content', '')) or \
+                   "Article"
+
+    # Content extraction with site-specific handling
+    content_text = ""
+
+    # Wikipedia specific extraction
+    if 'wikipedia.org' in url.lower():
+        log.debug("Detected Wikipedia, using specialized extraction")
+
+        # Get main content div
+        content_div = soup.find('div', id='mw-content-text')
+        if content_div:
+            # Skip short paragraphs and references
+            content_paragraphs = [
+                text for text in page.paragraph_texts(content_div, min_length=50)
+                if not text.startswith('[') and 'cite' not in text.lower()
+            ]
+
+            content_text = '\n\n'.join(content_paragraphs)
+            log.debug("Wikipedia extraction", extra={'chars': len(content_text)})
+
+    # General content extraction fallbacks
+    if len(content_text) < 100:
+        log.debug("Using general content extraction")
+
+        # Try article tag first
+        article = soup.find('article')
+        if article:
+            content_text = '\n\n'.join(page.paragraph_texts(article))
+
+        # Try main content areas
+        if len(content_text) < 100:
+            for selector in CONTENT_SELECTORS:
+                content_divs = soup.select(selector)
+                if content_divs:
+                    for div in content_divs:
+                        text = '\n\n'.join(page.paragraph_texts(div))
+                        if len(text) > len(content_text):
+                            content_text = text
+                    if len(content_text) > 100:
+                        break
+
+        # Last resort: all paragraphs
+        if len(content_text) < 100:
+            content_text = '\n\n'.join(page.paragraph_texts())
+
+    log.info("Fallback extraction", extra={'chars': len(content_text)})
+    return title, content_text
+
+
+def extract_article(html, url):
+    """Parse once, run readability and fall back to the heuristic extractors when it comes up short"""
+    page = ParsedPage(html)
+    title, content = readability_extract(page)
+    log.info("Readability extraction", extra={'chars': len(content)})
+
+    # Enhanced fallback extraction with Wikipedia-specific handling
+    if len(content) < 100:
+        title, content = fallback_extract(page, url, title)
+    return title, content
@@ -0,0 +1,414 @@
+import os
+import re
+import time
+import random
+import threading
+import contextvars
+from collections import namedtuple
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+from main import get_html_with_human_behavior
+from async_browser import submit_html_async
+from http_sessions import get_host_session
+import metrics
+from block_detector import detect_block, BLOCK_STATUSES
+from html_cache import get_html_cache, validators_from, conditional_headers
+from structured_log import get_logger
+
+log = get_logger('fetcher')
+
+
+# refused: some leg got a 403/429/503, so a failed fetch was the site saying no, not a broken link
+FetchResult = namedtuple('FetchResult', ['html', 'source', 'blocked', 'refused'], defaults=[False])
+
+# Pages that pass the length bar but may still be a landing/error shell must mention one of these
+ARTICLE_HINTS = re.compile(r'article|news|content|story|post', re.IGNORECASE)
+
+MIN_HTML_LENGTH = 500
+
+FETCH_DEADLINE = float(os.environ.get('FETCH_DEADLINE', '90'))
+FETCH_HEDGE_DELAY = float(os.environ.get('FETCH_HEDGE_DELAY', '2'))
+
+# Revalidating a cached page is one plain conditional GET; sites that refuse it get the full fetch
+REVALIDATE_TIMEOUT = 10
+REVALIDATE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# 'sync': thread-per-browser pool (main.py); 'async': pages multiplexed on one event loop;
+# 'none': plain HTTP only (hosts without Chromium, load tests against a local origin)
+BROWSER_ENGINE = os.environ.get('BROWSER_ENGINE', 'sync').lower()
+if BROWSER_ENGINE not in ('async', 'none'):
+    BROWSER_ENGINE = 'sync'
+
+
+def _start_leg(name, leg):
+    """Run one fetch leg on a thread of its own and return a Future for its result.
+
+    Legs are not pooled: a shared pool sized below the number of concurrent
+    requests lets a few stalled fetches (a refusing site holds its leg for the
+    whole deadline) queue healthy ones until their deadline has run out.
+    Abandoned legs notice the cancel event and exit.
+    """
+    future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(leg))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f'fetch-{name}', daemon=True).start()
+    return future
+
+
+def get_html_fallback(url, cancel=None, deadline=None, validators=None, refusals=None):
+    """Universal enhanced fallback method using requests with multi-site strategies
+
+    Stops early once cancel (a threading.Event) is set or the monotonic deadline passes.
+    validators (a dict), when given, receives the winning response's ETag and Last-Modified;
+    refusals (a list) collects every 403/429/503 status the site answered with.
+    """
+    log.info("Using universal enhanced requests fallback method")
+    
+    # Universal user agents that work well across sites
+    universal_user_agents = [
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/119.0'
+    ]
+    
+    # Universal referer strategies that work across sites
+    domain = '/'.join(url.split('/')[:3])
+    site_name = domain.replace('https://', '').replace('http://', '').replace('www.', '')
+    
+    universal_referers = [
+        f'https://www.google.com/search?q={site_name.replace(".", "+")}',
+        f'https://www.google.co.in/search?q={site_name.replace(".", "+")}+news',
+        'https://www.bing.com/search?q=' + site_name.replace('.', '+'),
+        'https://duckduckgo.com/?q=' + site_name.replace('.', '+'),
+        f'{domain}/',
+        f'{domain}/latest',
+        f'{domain}/news',
+        'https://twitter.com/',
+        'https://facebook.com/',
+        ''  # No referer
+    ]
+    
+    # Advanced session configurations
+    session_configs = [
+        {
+            'timeout': 15,
+            'allow_redirects': True,
+            'verify': True,
+            'stream': False
+        },
+        {
+            'timeout': 20,
+            'allow_redirects': True,
+            'verify': False,
+            'stream': True
+        },
+        {
+            'timeout': 10,
+            'allow_redirects': False,
+            'verify': True,
+            'stream': False
+        }
+    ]
+    
+    # Try multiple strategies with enhanced headers
+    for attempt in range(len(universal_user_agents)):
+        for referer_idx, referer in enumerate(universal_referers):
+            for config_idx, config in enumerate(session_configs):
+                if (cancel and cancel.is_set()) or (deadline and time.monotonic() >= deadline):
+                    log.info("Fallback fetch cancelled")
+                    return None
+                
+                try:
+                    ua = universal_user_agents[attempt]
+                    
+                    # Enhanced headers that mimic real browser requests
+                    headers = {
+                        'User-Agent': ua,
+                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+                        'Accept-Language': 'en-US,en;q=0.9',
+                        'Accept-Encoding': 'gzip, deflate, br',
+                        'DNT': '1',
+                        'Connection': 'keep-alive',
+                        'Upgrade-Insecure-Requests': '1',
+                        'Sec-Fetch-Dest': 'document',
+                        'Sec-Fetch-Mode': 'navigate',
+                        'Sec-Fetch-Site': 'cross-site' if referer else 'none',
+                        'Sec-Fetch-User': '?1',
+                        'Cache-Control': 'max-age=0',
+                    }
+                    
+                    # Add Chrome-specific headers for Chrome user agents
+                    if 'Chrome' in ua:
+                        headers.update({
+                            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+                            'sec-ch-ua-mobile': '?0',
+                            'sec-ch-ua-platform': '"Windows"',
+                            'sec-ch-viewport-width': '1920',
+                            'sec-ch-viewport-height': '1080'
+                        })
+                    
+                    if referer:
+                        headers['Referer'] = referer
+                    
+                    log.debug(f"Attempt {attempt+1}.{referer_idx+1}.{config_idx+1}", extra={'user_agent': ua[:40], 'referer': referer})
+                    
+                    # Reuse the host's pooled keep-alive session (cookies persist for a bounded time)
+                    host_session = get_host_session(url)
+                    session = host_session.session
+                    
+                    # For certain sites, establish session via homepage first (like NDTV success)
+                    if (not host_session.homepage_visited and referer_idx < 3
+                            and any(site in url.lower() for site in ['ndtv.com', 'cnn.com', 'bbc.com'])):
+                        try:
+                            log.debug(f"Establishing session via {domain}")
+                            homepage_response = session.get(domain, headers=headers, timeout=10)
+                            host_session.homepage_visited = True
+                            if homepage_response.status_code == 200:
+                                time.sleep(random.uniform(1, 2))
+                        except Exception as e:
+                            log.debug(f"Homepage visit failed: {e}")
+                    
+                    # Now request the actual article, never past the deadline
+                    if deadline:
+                        config = dict(config, timeout=max(1, min(config['timeout'], deadline - time.monotonic())))
+                    response = session.get(url, headers=headers, **config)
+                    
+                    if response.status_code == 200:
+                        content = response.text
+                        
+                        # Universal blocking detection (top of the page only, no lowercased copy)
+                        block = detect_block(content)
+                        if block:
+                            log.debug(f"Blocked content detected ({block.rule}: '{block.phrase}'), trying next strategy")
+                            continue
+                        
+                        # Check content quality - adjust thresholds based on site
+                        min_length = 8000 if 'ndtv.com' in url else 5000
+                        decent_length = 3000 if 'ndtv.com' in url else 2000
+                        
+                        if len(content) > min_length:
+                            log.info(f"Success with strategy {attempt+1}.{referer_idx+1}.{config_idx+1}", extra={'chars': len(content)})
+                            if validators is not None:
+                                validators.update(validators_from(response.headers))
+                            return content
+                        elif len(content) > decent_length:
+                            # Double-check it's not an error page
+                            if ARTICLE_HINTS.search(content):
+                                log.info(f"Success (decent content) with strategy {attempt+1}.{referer_idx+1}.{config_idx+1}", extra={'chars': len(content)})
+                                if validators is not None:
+                                    validators.update(validators_from(response.headers))
+                                return content
+                            else:
+                                log.debug(f"Suspicious content ({len(content)} chars), trying next")
+                        else:
+                            log.debug(f"Short content ({len(content)} chars), trying next")
+                            
+                    elif response.status_code in [403, 503, 451, 429]:
+                        log.debug(f"HTTP {response.status_code} (blocked/rate limited), trying next strategy")
+                        if refusals is not None and response.status_code in BLOCK_STATUSES:
+                            refusals.append(response.status_code)
+                        continue
+                    else:
+                        log.debug(f"HTTP {response.status_code}, trying next")
+                        
+                except Exception as e:
+                    log.debug(f"Strategy {attempt+1}.{referer_idx+1}.{config_idx+1} failed: {e}")
+                    continue
+                
+                # Small delay between attempts to avoid rate limiting (cut short on cancel)
+                delay = random.uniform(0.5, 1.5)
+                if cancel:
+                    cancel.wait(delay)
+                else:
+                    time.sleep(delay)
+    
+    log.warning("All enhanced fallback strategies failed")
+    return None
+
+
+def check_html(html):
+    """(usable, reason) for a fetched page: long enough and not an error/block page"""
+    if not html:
+        return False, 'empty'
+    block = detect_block(html)
+    if block:
+        return False, f"blocked ({block.rule}: '{block.phrase}')"
+    if len(html) < MIN_HTML_LENGTH:
+        return False, f'too short ({len(html)} chars)'
+    return True, 'ok'
+
+
+def revalidate_cached(url, cache, deadline_at, timings=None):
+    """FetchResult for a cached page confirmed by a conditional GET, or None to fetch normally.
+
+    A 304 reuses the stored page with no browser and no body download. A 200
+    replaces it only when the page was first fetched over plain HTTP; pages
+    that needed the browser are dropped and fetched again the full way.
+    """
+    cached = cache.get(url)
+    if cached is None:
+        metrics.HTML_CACHE.inc(outcome='miss')
+        return None
+
+    try:
+        with metrics.timed('revalidate', timings):
+            response = get_host_session(url).session.get(
+                url,
+                headers=dict(REVALIDATE_HEADERS, **conditional_headers(cached)),
+                timeout=max(1, min(REVALIDATE_TIMEOUT, deadline_at - time.monotonic()))
+            )
+    except Exception as e:
+        log.debug(f"Revalidation failed: {e}")
+        metrics.HTML_CACHE.inc(outcome='failed')
+        return None
+
+    if response.status_code == 304:
+        cache.touch(url)
+        metrics.HTML_CACHE.inc(outcome='not_modified')
+        log.info("Cached page not modified", extra={'cached_from': cached.source})
+        return FetchResult(cached.html, 'cache', False)
+
+    if response.status_code == 200:
+        metrics.HTML_CACHE.inc(outcome='modified')
+        usable, _ = check_html(response.text)
+        if usable and cached.source == 'fallback':
+            cache.put(url, response.text, source='fallback', **validators_from(response.headers))
+            return FetchResult(response.text, 'fallback', False)
+        cache.delete(url)
+        return None
+
+    metrics.HTML_CACHE.inc(outcome='failed')
+    log.debug(f"Revalidation got HTTP {response.status_code}, fetching normally")
+    return None
+
+
+def fetch_html(url, deadline=None, hedge_delay=None, timings=None):
+    """Race the browser and plain HTTP fetches and return the first usable page.
+
+    The site's preferred method starts at once and the other is hedged in
+    after hedge_delay seconds (or as soon as the first one fails). The first
+    response passing check_html wins and the rest are cancelled; nothing runs
+    past the overall deadline. Returns a FetchResult; when every leg failed
+    but one returned a block page, that page comes back with blocked=True,
+    and refused=True when any leg was answered with a 403/429/503.
+    Each leg's duration is recorded as a stage timing (into timings if given).
+
+    A page in the HTML cache is revalidated first and, when unchanged, used
+    without racing anything. Winning pages that came with an ETag or
+    Last-Modified are stored for next time.
+    """
+    deadline_at = time.monotonic() + (deadline or FETCH_DEADLINE)
+    hedge_delay = FETCH_HEDGE_DELAY if hedge_delay is None else hedge_delay
+    cancel = threading.Event()
+
+    cache = get_html_cache()
+    if cache is not None:
+        cached = revalidate_cached(url, cache, deadline_at, timings)
+        if cached is not None:
+            metrics.FETCH_WINS.inc(path=cached.source)
+            return cached
+
+    # NDTV rate limits bursts, so real fetches (not cache revalidations) are spaced out
+    if 'ndtv.com' in url.lower():
+        log.info("NDTV detected - delaying to avoid rate limiting")
+        time.sleep(min(random.uniform(2, 5), max(0, deadline_at - time.monotonic())))
+
+    # Each leg reports the validators of the response it returns, and any refusal it ran into
+    validators = {'playwright': {}, 'fallback': {}}
+    refusals = []
+
+    # Each starter launches its leg and returns a Future for the leg's HTML
+    def start_browser():
+        if BROWSER_ENGINE == 'async':
+            # The page is a coroutine on the engine's loop; its future is waited on directly, no thread
+            started = time.perf_counter()
+            future = submit_html_async(url, validators=validators['playwright'], refusals=refusals)
+            future.add_done_callback(
+                lambda _: metrics.record_stage('browser_fetch', time.perf_counter() - started, timings)
+            )
+            return future
+
+        def browser_leg():
+            timeout = deadline_at - time.monotonic()
+            with metrics.timed('browser_fetch', timings):
+                return get_html_with_human_behavior(
+                    url, cancel=cancel, timeout=timeout, validators=validators['playwright'], refusals=refusals
+                )
+        return _start_leg('playwright', browser_leg)
+
+    def start_http():
+        def http_leg():
+            with metrics.timed('fallback_fetch', timings):
+                return get_html_fallback(url, cancel=cancel, deadline=deadline_at, validators=validators['fallback'],
+                                         refusals=refusals)
+        return _start_leg('fallback', http_leg)
+
+    # For NDTV the plain HTTP path is proven to work better, so it goes first
+    if 'ndtv.com' in url.lower():
+        legs = [('fallback', start_http), ('playwright', start_browser)]
+    else:
+        legs = [('playwright', start_browser), ('fallback', start_http)]
+    if BROWSER_ENGINE == 'none':
+        legs = [leg for leg in legs if leg[0] != 'playwright']
+
+    pending = {}
+    blocked_html = None
+    next_hedge_at = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+            if legs and (now >= next_hedge_at or not pending):
+                name, start = legs.pop(0)
+                log.info(f"Starting {name} fetch")
+                pending[start()] = name
+                next_hedge_at = now + hedge_delay
+
+            remaining = deadline_at - now
+            if remaining <= 0 or not pending:
+                break
+
+            timeout = min(remaining, max(0, next_hedge_at - now)) if legs else remaining
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    html = future.result()
+                except Exception as e:
+                    log.warning(f"{name} fetch failed: {e}")
+                    continue
+
+                usable, reason = check_html(html)
+                if usable:
+                    log.info(f"{name} fetch won", extra={'chars': len(html)})
+                    metrics.FETCH_WINS.inc(path=name)
+                    if cache is not None:
+                        cache.put(url, html, source=name, **validators[name])
+                    return FetchResult(html, name, False)
+                log.info(f"{name} fetch rejected: {reason}")
+                if html and reason.startswith('blocked') and len(html) > len(blocked_html or ''):
+                    blocked_html = html
+
+        if time.monotonic() >= deadline_at:
+            log.warning("Fetch deadline reached", extra={'url': url})
+        metrics.FETCH_WINS.inc(path='none')
+        return FetchResult(blocked_html, None, blocked_html is not None, bool(refusals))
+    finally:
+        cancel.set()
+        for future in pending:
+            future.cancel()
@@ -1,14 +1,123 @@
 import os
+import time
+import random
+import threading
+
+import httpx
+import openai
 from langchain_openai import ChatOpenAI
 
+from structured_log import get_logger
+
+log = get_logger('hackclub_ai')
+
+# Status codes worth another attempt: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _is_retryable(error):
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def _retry_delay(error, attempt, base, cap):
+    """Full-jitter exponential backoff, honouring Retry-After when the API sends it"""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class PooledLLM:
+    """Process-wide chat client: one keep-alive connection pool, a cap on
+    concurrent calls and jittered retries on 429/5xx.
+
+    Exposes the invoke()/stream() calls the app uses on ChatOpenAI.
+    """
+
+    def __init__(self, llm, max_concurrency=4, max_retries=3, backoff_base=0.5, backoff_cap=8.0):
+        self.llm = llm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def invoke(self, messages, **kwargs):
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return self.llm.invoke(messages, **kwargs)
+                except Exception as e:
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = _retry_delay(e, attempt, self.backoff_base, self.backoff_cap)
+                    log.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+    def stream(self, messages, **kwargs):
+        """Stream chunks; a failed call is only retried before its first chunk"""
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    for chunk in self.llm.stream(messages, **kwargs):
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = _retry_delay(e, attempt, self.backoff_base, self.backoff_cap)
+                    log.warning(f"LLM stream failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
 def get_hackclub_ai():
-    api_key = "none-thanks-to-hackclub"
+    """Shared LLM client, built once per process from the environment"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = _build_client()
+    return _llm
+
+
+def _build_client():
+    api_key = os.environ.get('HACKCLUB_API_KEY', 'none-thanks-to-hackclub')
+    timeout = float(os.environ.get('HACKCLUB_AI_TIMEOUT', '60'))
+    pool_size = int(os.environ.get('HACKCLUB_AI_POOL_SIZE', '10'))
+
+    # Keep-alive pool so TLS connections to the API are reused between requests
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=60
+        ),
+        timeout=httpx.Timeout(timeout, connect=10)
+    )
 
     llm = ChatOpenAI(
         api_key=api_key,
-        base_url="https://ai.hackclub.com",
-        model="qwen/qwen3-32b",
-        temperature=1.0
+        base_url=os.environ.get('HACKCLUB_BASE_URL', 'https://ai.hackclub.com'),
+        model=os.environ.get('HACKCLUB_AI_MODEL', 'qwen/qwen3-32b'),
+        temperature=float(os.environ.get('HACKCLUB_AI_TEMPERATURE', '1.0')),
+        timeout=timeout,
+        max_retries=0,  # retried with jitter by PooledLLM
+        http_client=http_client
     )
 
-    return llm
+    return PooledLLM(
+        llm,
+        max_concurrency=int(os.environ.get('HACKCLUB_AI_MAX_CONCURRENCY', '4')),
+        max_retries=int(os.environ.get('HACKCLUB_AI_MAX_RETRIES', '3'))
+    )
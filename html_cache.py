@@ -0,0 +1,133 @@
+import os
+import time
+import zlib
+import sqlite3
+import tempfile
+import threading
+from collections import namedtuple
+
+from summary_cache import normalize_url
+from structured_log import get_logger
+
+log = get_logger('html_cache')
+
+
+# Disk budget for the compressed page bodies; 0 turns the cache off
+HTML_CACHE_MAX_BYTES = int(os.environ.get('HTML_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Shared by every gunicorn worker on the host
+HTML_CACHE_DB = os.environ.get('HTML_CACHE_DB') or os.path.join(
+    tempfile.gettempdir(), 'readitnow_html_cache.sqlite3'
+)
+
+CachedPage = namedtuple('CachedPage', ['html', 'etag', 'last_modified', 'source'])
+
+
+def validators_from(headers):
+    """{'etag', 'last_modified'} from response headers (requests or Playwright); values may be None"""
+    lowered = {name.lower(): value for name, value in (headers or {}).items()}
+    return {'etag': lowered.get('etag'), 'last_modified': lowered.get('last-modified')}
+
+
+def conditional_headers(page):
+    """If-None-Match / If-Modified-Since for revalidating a cached page"""
+    headers = {}
+    if page.etag:
+        headers['If-None-Match'] = page.etag
+    if page.last_modified:
+        headers['If-Modified-Since'] = page.last_modified
+    return headers
+
+
+class HtmlCache:
+    """Fetched article HTML on local disk, with the validators to revalidate it.
+
+    Bodies are zlib-compressed into SQLite and keyed on the normalized URL.
+    Only responses carrying an ETag or Last-Modified are kept, since nothing
+    else can be confirmed with a 304. Once the compressed total passes
+    max_bytes the least recently used pages are evicted.
+    """
+
+    def __init__(self, db_path=HTML_CACHE_DB, max_bytes=HTML_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, '
+            'etag TEXT, last_modified TEXT, source TEXT, used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS pages_used ON pages (used)')
+        self._db.commit()
+
+    def get(self, url):
+        """The cached page for url, or None; a hit still has to be revalidated before use"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, etag, last_modified, source FROM pages WHERE url = ?', (normalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, source = row
+        return CachedPage(zlib.decompress(body).decode('utf-8'), etag, last_modified, source)
+
+    def put(self, url, html, etag=None, last_modified=None, source=None):
+        """Store a page under its validators; returns False when there is nothing to revalidate with"""
+        if not html or not (etag or last_modified):
+            return False
+        body = zlib.compress(html.encode('utf-8'), 6)
+        if len(body) > self.max_bytes:
+            return False
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO pages (url, body, size, etag, last_modified, source, used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (normalize_url(url), body, len(body), etag, last_modified, source, time.time())
+            )
+            self._evict()
+            self._db.commit()
+        return True
+
+    def touch(self, url):
+        """Mark a page as just revalidated (most recently used)"""
+        with self._lock:
+            self._db.execute('UPDATE pages SET used = ? WHERE url = ?', (time.time(), normalize_url(url)))
+            self._db.commit()
+
+    def delete(self, url):
+        with self._lock:
+            self._db.execute('DELETE FROM pages WHERE url = ?', (normalize_url(url),))
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for url, size in self._db.execute('SELECT url, size FROM pages ORDER BY used').fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._db.executemany('DELETE FROM pages WHERE url = ?', evicted)
+        log.info("Evicted cached pages", extra={'evicted': len(evicted), 'bytes': total})
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages').fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_html_cache():
+    """Process-wide HTML cache, or None when HTML_CACHE_MAX_BYTES is 0"""
+    global _cache
+    if HTML_CACHE_MAX_BYTES <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HtmlCache()
+    return _cache
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """A background summarization run and the progress events it has emitted"""
+
+    def __init__(self, url):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.result = None
+        self.created = time.time()
+        self.finished = None
+        self._events = []
+        self._cond = threading.Condition()
+
+    def progress(self, stage, **info):
+        """Callback handed to the pipeline to report the stage it entered"""
+        with self._cond:
+            self.stage = stage
+        self.emit('progress', dict(info, stage=stage))
+
+    def delta(self, text):
+        """Callback handed to the pipeline for each piece of streamed summary text"""
+        self.emit('delta', {'text': text})
+
+    def emit(self, event, data):
+        with self._cond:
+            self._events.append((event, data))
+            self._cond.notify_all()
+
+    def finish(self, result):
+        with self._cond:
+            self.result = result
+            self.status = 'done' if result.get('success') else 'failed'
+            self.stage = self.status
+            self.finished = time.time()
+            self._events.append((self.status, result))
+            self._cond.notify_all()
+
+    def events_since(self, index, timeout):
+        """Events after index, waiting up to timeout for new ones; also reports completion"""
+        with self._cond:
+            if index >= len(self._events) and self.finished is None:
+                self._cond.wait(timeout)
+            return self._events[index:], self.finished is not None
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                'job_id': self.id,
+                'url': self.url,
+                'status': self.status,
+                'stage': self.stage,
+                'result': self.result,
+            }
+
+
+class JobManager:
+    """Runs summarization jobs on a background executor and keeps them for polling"""
+
+    def __init__(self, max_workers=4, ttl=600):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='summary-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url, fn):
+        """Start fn(url, progress, on_delta) in the background; fn returns the /summarize payload"""
+        self._prune()
+        job = Job(url)
+        with self._lock:
+            self._jobs[job.id] = job
+        # Carry the submitting request's context (request id) into the worker
+        self._executor.submit(contextvars.copy_context().run, self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stream(self, job, start=0, keepalive=15):
+        """Server-sent event stream of a job's events, replayed from index start"""
+        index = start
+        while True:
+            events, finished = job.events_since(index, timeout=keepalive)
+            for offset, (event, data) in enumerate(events):
+                yield f"id: {index + offset}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+            index += len(events)
+            if finished and not events:
+                break
+            if not events:
+                yield ": keep-alive\n\n"
+
+    def _run(self, job, fn):
+        job.status = 'running'
+        try:
+            result = fn(job.url, job.progress, job.delta)
+        except Exception as e:
+            result = {'success': False, 'error': f'Server error: {str(e)}'}
+        job.finish(result)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished is not None and job.finished < cutoff]:
+                del self._jobs[job_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide job manager; jobs live in the worker process that accepted them"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(
+                    max_workers=int(os.environ.get('JOB_WORKERS', '4')),
+                    ttl=int(os.environ.get('JOB_TTL', '600'))
+                )
+    return _manager
@@ -0,0 +1,221 @@
+"""Load driver: throughput and tail latency of /summarize under gunicorn.
+
+    python loadtest/drive.py [--workers 1,2,4] [--worker-classes gthread,sync] [--threads 8]
+                             [--concurrency 16] [--requests 200]
+                             [--llm-args "--ttft-ms 500"] [--origin-args "--error-rate 0.1"]
+
+Starts the stub LLM (stub_llm.py) and the fake origin (origin.py), then for
+every worker class and worker count starts the app under gunicorn with
+BROWSER_ENGINE=none and HACKCLUB_BASE_URL pointed at the stub, and keeps
+--concurrency clients posting /summarize until --requests have finished.
+Each request asks for a fresh article URL, so caches only hit with
+--cache-hits. Prints one row per configuration: throughput, p50/p95/p99
+latency and the error count.
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import random
+import socket
+import argparse
+import itertools
+import subprocess
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(LOADTEST_DIR)
+
+# Full-size article pages; the short static-site page is below the plain HTTP
+# fetcher's length bar, so without a browser it only ever times out
+DEFAULT_PAGES = 'wikipedia_lighthouse_keeper,ndtv_monsoon_kerala,blog_wordpress_sourdough'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode} before it came up")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start(args, url, env=None):
+    """Start a server process and wait until url answers"""
+    process = subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(url, process)
+    except Exception:
+        stop(process)
+        raise
+    return process
+
+
+def stop(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def drive(app_url, urls, concurrency, total):
+    """Closed loop: concurrency clients, total requests. Returns latencies (s), errors and wall time"""
+    latencies, errors = [], Counter()
+    lock = threading.Lock()
+    remaining = itertools.count()
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        while True:
+            with lock:
+                if next(remaining) >= total:
+                    return
+                url = next(urls)
+            started = time.perf_counter()
+            try:
+                response = local.session.post(f'{app_url}/summarize', json={'url': url}, timeout=300)
+                body = response.json()
+                error = None if response.ok and body.get('success') else body.get('error', f'HTTP {response.status_code}')
+            except (requests.RequestException, ValueError) as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    errors[error.splitlines()[0][:60]] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - started
+
+
+def article_urls(origin_url, pages, cache_hits):
+    """Endless article URLs cycling through pages; unique per request unless cache_hits"""
+    run = random.randrange(1 << 30)
+    for n in itertools.count():
+        page = pages[n % len(pages)]
+        token = 'cached' if cache_hits else f'{run}-{n}'
+        yield f'{origin_url}/pages/{page}/{token}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test /summarize under gunicorn against local stubs')
+    parser.add_argument('--workers', default='1,2,4', help='gunicorn worker counts to try')
+    parser.add_argument('--worker-classes', default='gthread,sync', help='gunicorn worker classes to try')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per configuration')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per configuration')
+    parser.add_argument('--pages', default=DEFAULT_PAGES, help='corpus pages to request, comma separated')
+    parser.add_argument('--cache-hits', action='store_true', help='reuse one URL per page so caches hit')
+    parser.add_argument('--llm-args', default='', help='extra arguments for stub_llm.py')
+    parser.add_argument('--origin-args', default='', help='extra arguments for origin.py')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    llm_port, origin_port = free_port(), free_port()
+    llm_url, origin_url = f'http://127.0.0.1:{llm_port}', f'http://127.0.0.1:{origin_port}'
+    llm = start([sys.executable, os.path.join(LOADTEST_DIR, 'stub_llm.py'), '--port', str(llm_port)]
+                + shlex.split(args.llm_args), llm_url)
+    origin = start([sys.executable, os.path.join(LOADTEST_DIR, 'origin.py'), '--port', str(origin_port)]
+                   + shlex.split(args.origin_args), origin_url)
+
+    pages = [page for page in args.pages.split(',') if page]
+    results = []
+    print(f"{'class':<9}{'workers':>8}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'max s':>9}{'errors':>8}")
+    try:
+        for worker_class, workers in itertools.product(args.worker_classes.split(','), args.workers.split(',')):
+            app_port = free_port()
+            app_url = f'http://127.0.0.1:{app_port}'
+            state_dir = tempfile.mkdtemp(prefix='readitnow-load-')
+            env = dict(
+                os.environ,
+                BROWSER_ENGINE='none',
+                HACKCLUB_BASE_URL=llm_url,
+                HACKCLUB_API_KEY='stub',
+                LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'),
+                # Fresh circuit breaker, HTML cache and article store per configuration
+                DOMAIN_HEALTH_DB=os.path.join(state_dir, 'health.sqlite3'),
+                HTML_CACHE_DB=os.path.join(state_dir, 'html.sqlite3'),
+                ARTICLE_STORE_DB=os.path.join(state_dir, 'articles.sqlite3'),
+            )
+            env.pop('SUMMARY_CACHE_DB', None)
+            gunicorn = [
+                sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{app_port}',
+                '--workers', workers, '--worker-class', worker_class, '--timeout', '300', '--log-level', 'warning', 'app:app'
+            ]
+            if worker_class == 'gthread':
+                gunicorn[-1:-1] = ['--threads', str(args.threads)]
+
+            app = start(gunicorn, f'{app_url}/health', env=env)
+            try:
+                urls = article_urls(origin_url, pages, args.cache_hits)
+                if args.warmup:
+                    drive(app_url, urls, min(args.concurrency, args.warmup), args.warmup)
+                latencies, errors, wall = drive(app_url, urls, args.concurrency, args.requests)
+            finally:
+                stop(app)
+
+            row = {
+                'worker_class': worker_class,
+                'workers': int(workers),
+                'threads': args.threads if worker_class == 'gthread' else 1,
+                'concurrency': args.concurrency,
+                'requests': len(latencies),
+                'throughput': round(len(latencies) / wall, 2),
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'max': round(max(latencies, default=0), 3),
+                'errors': dict(errors),
+            }
+            results.append(row)
+            print(f"{worker_class:<9}{workers:>8}{row['throughput']:>9.2f}{row['p50']:>9.3f}{row['p95']:>9.3f}"
+                  f"{row['p99']:>9.3f}{row['max']:>9.3f}{sum(errors.values()):>8}", flush=True)
+            for error, count in errors.items():
+                print(f"{'':<17}{count:>5} x {error}")
+    finally:
+        stop(origin)
+        stop(llm)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Fake article origin for load tests, serving the pages in bench/corpus.
+
+    python loadtest/origin.py [--port 8091] [--error-rate 0.1] [--slow-rate 0.05 --slow-ms 5000]
+
+GET /pages/<name>/<token> returns the corpus page <name>. The token is
+written into the first paragraph, so every distinct token is a distinct
+article to the app's URL and content caches. GET / lists the pages.
+
+Faults are injected at random: --error-rate answers with one of
+--error-statuses (403 gets the corpus block page, 429 a Retry-After), and
+--slow-rate holds the response for --slow-ms. A single request can force
+them with ?status=429 or ?delay_ms=3000.
+
+Pages carry an ETag and Last-Modified and conditional requests for an
+unchanged page get a bodiless 304, unless --no-validators is given.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import random
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench', 'corpus')
+BLOCK_PAGE = 'blocked_akamai'
+
+
+def load_pages():
+    with open(os.path.join(CORPUS_DIR, 'manifest.json')) as f:
+        manifest = json.load(f)
+    pages = {}
+    for entry in manifest:
+        with open(os.path.join(CORPUS_DIR, entry['name'] + '.html'), encoding='utf-8') as f:
+            pages[entry['name']] = dict(entry, html=f.read())
+    return pages
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Threaded server that shrugs off clients hanging up mid-request"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'StubOrigin/1.0'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        pages, options = self.server.pages, self.server.options
+
+        if parts.path in ('', '/'):
+            index = [
+                {'name': name, 'layout': page['layout'], 'bytes': len(page['html']), 'path': f'/pages/{name}/0'}
+                for name, page in pages.items()
+            ]
+            return self._send(200, json.dumps(index, indent=2), 'application/json')
+
+        segments = parts.path.strip('/').split('/')
+        if len(segments) < 2 or segments[0] != 'pages' or segments[1] not in pages:
+            return self._send(404, '<html><body><h1>Not Found</h1></body></html>')
+
+        delay_ms = float(query.get('delay_ms', 0)) or (
+            options.slow_ms if random.random() < options.slow_rate else options.latency_ms
+        )
+        time.sleep(delay_ms / 1000)
+
+        status = int(query.get('status', 0)) or (
+            random.choice(options.error_statuses) if random.random() < options.error_rate else 200
+        )
+        if status == 403:
+            return self._send(403, pages[BLOCK_PAGE]['html'] if BLOCK_PAGE in pages else 'Forbidden')
+        if status == 429:
+            return self._send(429, '<html><body><h1>Too Many Requests</h1></body></html>', headers={'Retry-After': '5'})
+        if status != 200:
+            return self._send(status, f'<html><body><h1>Error {status}</h1></body></html>')
+
+        html = pages[segments[1]]['html']
+        token = segments[2] if len(segments) > 2 else ''
+        if token:
+            html = html.replace('<p>', f'<p>Copy {token}. ', 1)
+        if options.no_validators:
+            return self._send(200, html)
+
+        validators = {
+            'ETag': '"' + hashlib.sha1(html.encode('utf-8')).hexdigest()[:16] + '"',
+            'Last-Modified': self.server.started,
+        }
+        if (self.headers.get('If-None-Match') == validators['ETag']
+                or (not self.headers.get('If-None-Match') and self.headers.get('If-Modified-Since') == self.server.started)):
+            return self._send(304, '', headers=validators)
+        self._send(200, html, headers=validators)
+
+    def _send(self, status, text, content_type='text/html; charset=utf-8', headers=None):
+        data = text.encode('utf-8')
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake article origin serving bench/corpus')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--latency-ms', type=float, default=50, help='normal response delay')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of responses held for --slow-ms')
+    parser.add_argument('--slow-ms', type=float, default=5000)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of responses that are errors')
+    parser.add_argument('--error-statuses', default='403,429', help='statuses injected errors are drawn from')
+    parser.add_argument('--no-validators', action='store_true', help='send no ETag/Last-Modified, never 304')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    options = parser.parse_args(argv)
+    options.error_statuses = [int(status) for status in options.error_statuses.split(',') if status]
+
+    server = QuietServer((options.host, options.port), OriginHandler)
+    server.options = options
+    server.pages = load_pages()
+    server.started = formatdate(usegmt=True)
+    print(f"Origin serving {len(server.pages)} pages on http://{options.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
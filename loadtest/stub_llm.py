@@ -0,0 +1,167 @@
+"""OpenAI-compatible chat completions stub for load tests.
+
+    python loadtest/stub_llm.py [--port 8090] [--ttft-ms 300] [--token-ms 15] [--error-rate 0]
+
+Serves POST /chat/completions and /v1/chat/completions, plain and
+streamed (SSE). Every answer opens with a <think> block, like the reasoning
+models the app talks to, followed by a markdown summary. Point the app at
+it with HACKCLUB_BASE_URL=http://127.0.0.1:8090.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ids = itertools.count(1)
+
+
+def build_answer(prompt, think_words):
+    """Think block plus a markdown summary sized like the real model's"""
+    words = prompt.split()
+    think = ' '.join(random.choice(words) if words else 'hmm' for _ in range(think_words))
+    return (
+        f"<think>{think}</think>\n\n"
+        "**Key points**\n\n"
+        f"- The article runs to about {len(words)} words of prompt.\n"
+        "- It explains what happened, who was involved and what comes next.\n"
+        "- Officials and experts quoted in it expect the situation to develop over the coming days.\n\n"
+        "**Why it matters:** readers get the main facts and the context in under a minute."
+    )
+
+
+def pieces(text):
+    """Streamed tokens: words with their trailing whitespace"""
+    out, start = [], 0
+    for i, char in enumerate(text):
+        if char.isspace() and (i + 1 == len(text) or not text[i + 1].isspace()):
+            out.append(text[start:i + 1])
+            start = i + 1
+    if start < len(text):
+        out.append(text[start:])
+    return out
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Threaded server that shrugs off clients hanging up mid-request"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'StubLLM/1.0'
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/chat/completions', '/v1/chat/completions'):
+            return self._json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        options = self.server.options
+
+        if random.random() < options.error_rate:
+            return self._json(
+                429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                headers={'Retry-After': '1'}
+            )
+
+        prompt = '\n'.join(str(message.get('content', '')) for message in body.get('messages', []))
+        answer = build_answer(prompt, options.think_words)
+        model = body.get('model', 'stub')
+        completion_id = f'chatcmpl-stub-{next(_ids)}'
+        usage = {
+            'prompt_tokens': len(prompt) // 4 + 1,
+            'completion_tokens': len(pieces(answer)),
+            'total_tokens': len(prompt) // 4 + 1 + len(pieces(answer)),
+        }
+
+        time.sleep(options.ttft_ms / 1000)
+        if body.get('stream'):
+            return self._stream(completion_id, model, answer, options.token_ms)
+
+        time.sleep(options.token_ms * usage['completion_tokens'] / 1000)
+        self._json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': answer},
+                'finish_reason': 'stop',
+            }],
+            'usage': usage,
+        })
+
+    def _stream(self, completion_id, model, answer, token_ms):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            self._chunk(f'data: {json.dumps(chunk)}\n\n')
+
+        event({'role': 'assistant', 'content': ''})
+        for piece in pieces(answer):
+            time.sleep(token_ms / 1000)
+            event({'content': piece})
+        event({}, finish_reason='stop')
+        self._chunk('data: [DONE]\n\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='OpenAI-compatible chat completions stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--ttft-ms', type=float, default=300, help='delay before the first token')
+    parser.add_argument('--token-ms', type=float, default=15, help='delay per streamed token')
+    parser.add_argument('--think-words', type=int, default=40, help='words inside the <think> block')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with 429')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    options = parser.parse_args(argv)
+
+    server = QuietServer((options.host, options.port), StubLLMHandler)
+    server.options = options
+    print(f"Stub LLM on http://{options.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
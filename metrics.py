@@ -0,0 +1,153 @@
+import time
+import threading
+from contextlib import contextmanager
+
+from structured_log import get_logger
+
+log = get_logger('metrics')
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_registry = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels, rendered in Prometheus text format"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, ('le', bound))
+                    lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = _format_labels(self.labelnames, key, ('le', '+Inf'))
+                lines.append(f'{self.name}_bucket{labels} {series[-1]}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {series[-2]}')
+                lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    'readitnow_stage_seconds',
+    'Time spent in each pipeline stage',
+    ['stage']
+)
+REQUEST_SECONDS = Histogram(
+    'readitnow_request_seconds',
+    'End-to-end time of extract_and_summarize'
+)
+FETCH_WINS = Counter(
+    'readitnow_fetch_wins_total',
+    'Fetch path whose page was used',
+    ['path']
+)
+CACHE_HITS = Counter(
+    'readitnow_cache_hits_total',
+    'Summary cache hits by key kind (url or content)',
+    ['kind']
+)
+CACHE_MISSES = Counter(
+    'readitnow_cache_misses_total',
+    'Requests that missed the summary cache on both keys'
+)
+FAST_FAILS = Counter(
+    'readitnow_fast_fails_total',
+    'Requests refused without a fetch (circuit_open or negative_cache)',
+    ['kind']
+)
+HTML_CACHE = Counter(
+    'readitnow_html_cache_total',
+    'HTML cache lookups by outcome (miss, not_modified, modified, failed)',
+    ['outcome']
+)
+ERRORS = Counter(
+    'readitnow_errors_total',
+    'Pipeline errors by type',
+    ['type']
+)
+
+
+@contextmanager
+def timed(stage, timings=None):
+    """Time a pipeline stage into the stage histogram and, if given, a per-request timings dict"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started, timings)
+
+
+def record_stage(stage, elapsed, timings=None):
+    """Record a stage timed by other means (e.g. a future's completion) like timed() does"""
+    STAGE_SECONDS.observe(elapsed, stage=stage)
+    if timings is not None:
+        timings[stage] = round(elapsed, 4)
+    log.info('stage finished', extra={'stage': stage, 'duration_ms': round(elapsed * 1000, 1)})
+
+
+def render():
+    """All registered metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,410 @@
+import os
+import re
+import sys
+import json
+import asyncio
+import argparse
+import threading
+import contextvars
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from bs4 import BeautifulSoup
+from langchain_core.messages import HumanMessage
+
+import metrics
+from fetcher import fetch_html
+from extractor import ParsedPage, fallback_extract, extract_article
+from extraction_pool import get_extraction_pool
+from summarizer import summarize as summarize_article, process_markdown_to_html, MAP_REDUCE_TOKENS
+from hackclub_ai import get_hackclub_ai
+from summary_cache import get_summary_cache
+from compaction import compact, COMPACT_TOKEN_BUDGET
+from domain_health import get_domain_health
+from structured_log import get_logger
+
+log = get_logger('pipeline')
+
+
+# 'readability' (built-in, no LLM call) or 'llm' (model writes extraction code)
+EXTRACTION_MODE = os.environ.get('EXTRACTION_MODE', 'readability').lower()
+
+STAGE_NAMES = ('fetch', 'validate', 'extract', 'compact', 'summarize', 'render')
+
+
+class StageError(Exception):
+    """A pipeline stage failed with a user-facing message; error_type labels the errors counter"""
+
+    def __init__(self, message, error_type):
+        super().__init__(message, error_type)
+        self.error_type = error_type
+
+    def __str__(self):
+        return self.args[0]
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: Optional[str]
+    source: Optional[str] = None
+    blocked: bool = False
+    refused: bool = False  # a 403/429/503 came back along the way
+
+
+@dataclass
+class Article:
+    url: str
+    title: str
+    content: str
+
+
+@dataclass
+class Summary:
+    url: str
+    title: str
+    content: str
+    summary: str
+    summary_html: str = ''
+
+
+@dataclass
+class RunContext:
+    """Per-run options and outputs shared by the stages of one pipeline run"""
+    timings: dict = field(default_factory=dict)
+    on_delta: Optional[Callable[[str], None]] = None
+    host_limiter: Optional[object] = None
+
+
+# Per-run state lives in a context variable rather than in the stage arguments:
+# the thread and async executors copy it into their workers, and process-pool
+# stages (which only need their input) never have to pickle callbacks or locks
+current_run = contextvars.ContextVar('pipeline_run', default=None)
+
+
+def _run_context():
+    return current_run.get() or RunContext()
+
+
+# User-facing text for each fetch failure, shared by validation and the fail-fast paths
+FETCH_ERROR_MESSAGES = {
+    'ndtv_rate_limited': (
+        "NDTV is currently blocking automated access due to rate limiting. This is because:\n"
+        "• Multiple recent requests from the same IP address\n"
+        "• NDTV's enhanced anti-bot protection (Akamai EdgeSuite)\n"
+        "• Temporary IP-based blocking\n\n"
+        "💡 Solutions:\n"
+        "• Wait 10-15 minutes before trying again\n"
+        "• Try accessing from a different network/location\n"
+        "• Use a VPN if available\n"
+        "• Try the article URL directly in a regular browser first\n\n"
+        "The system will work normally once the rate limit expires."
+    ),
+    'fetch_failed': "Failed to access the article. The site might have strong anti-bot protection.",
+    'blocked': (
+        "The website is blocking automated access. This could be due to:\n"
+        "• Increased anti-bot protection\n"
+        "• CDN/EdgeSuite restrictions\n"
+        "• Temporary server issues\n\n"
+        "Try again in a few minutes or use a different article URL."
+    ),
+}
+
+
+def fetch_stage(url):
+    """Fetch the article HTML, racing Playwright and the plain HTTP fallback"""
+    run = _run_context()
+
+    # Domains that keep blocking us (and URLs that just failed) fail fast
+    verdict = get_domain_health().check(url)
+    if verdict:
+        kind, error_type = verdict
+        metrics.FAST_FAILS.inc(kind=kind)
+        log.info("Failing fast", extra={'url': url, 'kind': kind, 'error_type': error_type})
+        raise StageError(FETCH_ERROR_MESSAGES[error_type], error_type)
+
+    # First usable page wins; batches also hold a per-host slot while fetching
+    with run.host_limiter.slot(url) if run.host_limiter else nullcontext():
+        fetched = fetch_html(url, timings=run.timings)
+
+    return FetchedPage(url, fetched.html, fetched.source, fetched.blocked, fetched.refused)
+
+
+def validate_stage(page):
+    """Turn an empty or blocked fetch into a StageError with the message users see"""
+    if not page.html:
+        # Special handling for NDTV rate limiting
+        error_type = 'ndtv_rate_limited' if 'ndtv.com' in page.url.lower() else 'fetch_failed'
+    elif page.blocked:
+        # Every fetch path came back with an access denied / error page
+        error_type = 'blocked'
+    else:
+        get_domain_health().record_success(page.url)
+        return page
+
+    # Only the site refusing us counts against it; timeouts, 404s, DNS errors and a broken
+    # local browser say nothing about the domain and must not open its circuit. An empty
+    # NDTV fetch keeps its rate-limit message but counts only when NDTV actually refused us
+    if error_type == 'blocked' or page.refused:
+        get_domain_health().record_failure(page.url, error_type)
+    raise StageError(FETCH_ERROR_MESSAGES[error_type], error_type)
+
+
+def extract_stage(page):
+    """Pull out the title and article text, in the extraction process pool when one is configured"""
+    if EXTRACTION_MODE == 'llm':
+        parsed = ParsedPage(page.html)
+        title, content = llm_extract(page.url, page.html, parsed)
+        # Enhanced fallback extraction with Wikipedia-specific handling
+        if len(str(content)) < 100:
+            title, content = fallback_extract(parsed, page.url, title)
+    else:
+        pool = get_extraction_pool()
+        if pool is not None:
+            title, content = pool.extract(page.url, page.html)
+        else:
+            title, content = extract_article(page.html, page.url)
+
+    if len(str(content)) < 50:
+        raise StageError("Could not extract sufficient content from the article.", 'extraction_empty')
+
+    return Article(page.url, str(title), str(content))
+
+
+def llm_extract(url, html_content, parsed):
+    """Opt-in: AI-generated extraction code"""
+    extraction_prompt = f"""Extract content from this news article: {url}
+
+    The HTML contains an article. Extract:
+    1. Article title (look for h1, h2, or meta og:title)
+    2. Main article content (look for article, div with content/story classes, or paragraph tags)
+
+    Only output Python code that sets 'title' and 'content' variables as strings.
+    """
+
+    response = get_hackclub_ai().invoke([HumanMessage(content=extraction_prompt)])
+    generated_code = response.content.strip()
+
+    # Clean the generated code
+    generated_code = re.sub(r'<think>.*?</think>', '', generated_code, flags=re.DOTALL)
+    if '```python' in generated_code:
+        generated_code = generated_code.split('```python')[1].split('```')[0]
+    elif '```' in generated_code:
+        generated_code = generated_code.split('```')[1].split('```')[0]
+    generated_code = generated_code.strip()
+
+    # Execute the extraction
+    exec_namespace = {
+        'BeautifulSoup': BeautifulSoup,
+        'html_content': html_content,
+        'soup': parsed.soup,
+        'url': url
+    }
+
+    try:
+        exec(generated_code, exec_namespace)
+        return exec_namespace.get('title', ''), exec_namespace.get('content', '')
+    except Exception as e:
+        log.warning(f"AI extraction failed: {e}")
+        return '', ''
+
+
+def compact_stage(article):
+    """Strip boilerplate and repeats and cap the text at the token budget.
+
+    The cap defaults to what map-reduce covers, so compaction never cuts an
+    article the chunked summarizer could have read in full.
+    """
+    return Article(article.url, article.title, compact(article.content, COMPACT_TOKEN_BUDGET or MAP_REDUCE_TOKENS))
+
+
+def summarize_stage(article):
+    """Generate the 1-minute summary, streamed to on_delta when a listener is attached"""
+    run = _run_context()
+    summary_raw = summarize_article(
+        get_hackclub_ai(), article.title, article.content, on_delta=run.on_delta, cache=get_summary_cache()
+    )
+    return Summary(article.url, article.title, article.content, summary_raw)
+
+
+def render_stage(summary):
+    """Render the markdown summary to HTML for display"""
+    summary.summary_html = process_markdown_to_html(summary.summary)
+    return summary
+
+
+class InlineExecutor:
+    """Runs the stage on the calling thread"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class AsyncExecutor:
+    """Runs stages on a background asyncio loop.
+
+    Coroutine functions are awaited on the loop; plain functions are moved
+    off it with asyncio.to_thread so they never block other stages.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='pipeline-async', daemon=True).start()
+
+    def submit(self, fn, *args):
+        context = contextvars.copy_context()
+        return asyncio.run_coroutine_threadsafe(self._call(context, fn, args), self._loop)
+
+    @staticmethod
+    async def _call(context, fn, args):
+        if asyncio.iscoroutinefunction(fn):
+            for var, value in context.items():
+                var.set(value)  # the task runs in its own copy of the loop's context
+            return await fn(*args)
+        return await asyncio.to_thread(context.run, fn, *args)
+
+
+class ContextThreadPool(ThreadPoolExecutor):
+    """Thread pool whose workers see the submitting thread's context variables"""
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_executors = {'inline': InlineExecutor()}
+_executors_lock = threading.Lock()
+
+
+def get_executor(kind):
+    """Shared executor for a kind: inline, thread, process or async"""
+    executor = _executors.get(kind)
+    if executor is not None:
+        return executor
+    with _executors_lock:
+        if kind not in _executors:
+            if kind == 'thread':
+                _executors[kind] = ContextThreadPool(
+                    max_workers=int(os.environ.get('PIPELINE_THREADS', '16')),
+                    thread_name_prefix='pipeline'
+                )
+            elif kind == 'process':
+                # spawn, not fork: the parent runs browser and HTTP pool threads
+                _executors[kind] = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 2,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            elif kind == 'async':
+                _executors[kind] = AsyncExecutor()
+            else:
+                raise ValueError(f"Unknown executor kind: {kind}")
+        return _executors[kind]
+
+
+def parse_executor_config(spec):
+    """'extract=process,summarize=async' -> {'extract': 'process', 'summarize': 'async'}"""
+    config = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            stage, kind = item.split('=', 1)
+            config[stage.strip()] = kind.strip().lower()
+    return config
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    executor: str = 'inline'
+    progress: Optional[str] = None  # job progress event sent as the stage starts
+
+
+class Pipeline:
+    """An ordered list of stages; run() feeds each stage's output into the next"""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._index = {stage.name: i for i, stage in enumerate(self.stages)}
+
+    def with_executors(self, **executors):
+        """Copy of this pipeline with some stages moved to other executors (kinds or executor objects)"""
+        return Pipeline(
+            Stage(stage.name, stage.fn, executors.get(stage.name, stage.executor), stage.progress)
+            for stage in self.stages
+        )
+
+    def run(self, value, start=None, until=None, progress=None):
+        """Run stages from start (default: the first) through until (default: the last).
+
+        Stage durations go into the stage histogram and the current run's
+        timings. A failing stage raises; StageError carries the user message.
+        """
+        first = self._index[start] if start else 0
+        last = self._index[until] if until else len(self.stages) - 1
+        run = _run_context()
+
+        for stage in self.stages[first:last + 1]:
+            if progress and stage.progress:
+                info = {'title': value.title, 'url': value.url} if isinstance(value, Article) else {}
+                progress(stage.progress, **info)
+            executor = get_executor(stage.executor) if isinstance(stage.executor, str) else stage.executor
+            with metrics.timed(stage.name, run.timings):
+                value = executor.submit(stage.fn, value).result()
+        return value
+
+
+def build_pipeline(executor_config=None):
+    """The standard pipeline, with per-stage executors from PIPELINE_EXECUTORS unless given"""
+    if executor_config is None:
+        executor_config = parse_executor_config(os.environ.get('PIPELINE_EXECUTORS', ''))
+    stages = [
+        Stage('fetch', fetch_stage, progress='fetching'),
+        Stage('validate', validate_stage),
+        Stage('extract', extract_stage, progress='extracting'),
+        Stage('compact', compact_stage),
+        Stage('summarize', summarize_stage, progress='summarizing'),
+        Stage('render', render_stage),
+    ]
+    for stage in stages:
+        stage.executor = executor_config.get(stage.name, stage.executor)
+    return Pipeline(stages)
+
+
+def main(argv=None):
+    """Command line: python pipeline.py URL [--until STAGE] [--executors extract=process,...]"""
+    from structured_log import setup_logging
+
+    parser = argparse.ArgumentParser(description='Fetch, extract and summarize an article')
+    parser.add_argument('url')
+    parser.add_argument('--until', choices=STAGE_NAMES, default='render', help='last stage to run')
+    parser.add_argument('--executors', default=None, help='per-stage executors, e.g. extract=process')
+    args = parser.parse_args(argv)
+
+    setup_logging(os.environ.get('LOG_LEVEL', 'WARNING'))
+    config = parse_executor_config(args.executors) if args.executors is not None else None
+    pipeline = build_pipeline(config)
+
+    run = RunContext()
+    current_run.set(run)
+    try:
+        value = pipeline.run(args.url, until=args.until)
+    except StageError as e:
+        print(json.dumps({'success': False, 'error': str(e), 'timings': run.timings}, indent=2))
+        return 1
+
+    output = asdict(value)
+    if isinstance(value, FetchedPage):
+        output['html_length'] = len(output.pop('html') or '')
+    print(json.dumps(dict(output, success=True, timings=run.timings), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+from collections import namedtuple, OrderedDict
+from urllib.parse import urlsplit
+
+from structured_log import get_logger
+
+log = get_logger('readiness')
+
+
+# network_idle_ms: how long to wait for a quiet network after DOMContentLoaded
+# quiet_ms: mutation-free period required on the main text block
+# max_wait_ms: hard cap on the whole readiness wait
+# warmup: visit the site's homepage before the article
+ReadinessConfig = namedtuple('ReadinessConfig', ['network_idle_ms', 'quiet_ms', 'max_wait_ms', 'warmup'])
+
+DEFAULT_CONFIG = ReadinessConfig(
+    network_idle_ms=int(os.environ.get('READINESS_NETWORK_IDLE_MS', '2000')),
+    quiet_ms=int(os.environ.get('READINESS_QUIET_MS', '700')),
+    max_wait_ms=int(os.environ.get('READINESS_MAX_WAIT_MS', '8000')),
+    warmup=False
+)
+
+# Sites that load their article body late or want an organic-looking entry
+DOMAIN_CONFIGS = {
+    'ndtv.com': ReadinessConfig(network_idle_ms=3000, quiet_ms=1000, max_wait_ms=12000, warmup=True),
+    'cnn.com': DEFAULT_CONFIG._replace(warmup=True),
+    'bbc.com': DEFAULT_CONFIG._replace(warmup=True),
+}
+
+# Resolves once the largest text block has gone quiet_ms without DOM mutations
+QUIET_PERIOD_SCRIPT = """
+({quietMs, maxMs}) => new Promise((resolve) => {
+    const candidates = [
+        ...document.querySelectorAll('article, main, [role="main"]'),
+        document.body
+    ].filter(Boolean);
+    let target = document.body;
+    let longest = -1;
+    for (const node of candidates) {
+        const length = (node.innerText || '').length;
+        if (length > longest) {
+            longest = length;
+            target = node;
+        }
+    }
+    if (!target) {
+        resolve({settled: false, textLength: 0});
+        return;
+    }
+
+    let quietTimer = null;
+    const finish = (settled) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve({settled, textLength: (target.innerText || '').length});
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(target, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    const capTimer = setTimeout(() => finish(false), maxMs);
+})
+"""
+
+# Hosts with readiness timings kept per worker; the least recently fetched are dropped
+MAX_HOSTS = int(os.environ.get('READINESS_MAX_HOSTS', '64'))
+
+_stats = OrderedDict()
+_stats_lock = threading.Lock()
+
+
+def config_for(url):
+    host = (urlsplit(url).hostname or '').lower()
+    for domain, config in DOMAIN_CONFIGS.items():
+        if host == domain or host.endswith('.' + domain):
+            return config
+    return DEFAULT_CONFIG
+
+
+def wait_until_ready(page, url):
+    """Block until the page's main content has settled (or the cap is hit).
+
+    Waits for DOMContentLoaded, then a network-idle window, then a
+    MutationObserver quiet period on the largest text block, all within the
+    domain's max_wait_ms. Returns the seconds it actually took.
+    """
+    config = config_for(url)
+    started = time.monotonic()
+    deadline = started + config.max_wait_ms / 1000
+
+    def remaining_ms():
+        return max(0, int((deadline - time.monotonic()) * 1000))
+
+    settled = False
+    try:
+        page.wait_for_load_state('domcontentloaded', timeout=remaining_ms() or 1)
+        try:
+            page.wait_for_load_state('networkidle', timeout=min(config.network_idle_ms, remaining_ms()) or 1)
+        except Exception:
+            pass  # long-polling and ad beacons often keep the network busy
+        if remaining_ms():
+            result = page.evaluate(QUIET_PERIOD_SCRIPT, {'quietMs': config.quiet_ms, 'maxMs': remaining_ms()})
+            settled = bool(result and result.get('settled'))
+    except Exception as e:
+        log.warning(f"Readiness wait interrupted: {e}")
+
+    return _finish(url, started, settled)
+
+
+async def wait_until_ready_async(page, url):
+    """wait_until_ready for playwright.async_api pages; yields to the event loop while waiting"""
+    config = config_for(url)
+    started = time.monotonic()
+    deadline = started + config.max_wait_ms / 1000
+
+    def remaining_ms():
+        return max(0, int((deadline - time.monotonic()) * 1000))
+
+    settled = False
+    try:
+        await page.wait_for_load_state('domcontentloaded', timeout=remaining_ms() or 1)
+        try:
+            await page.wait_for_load_state('networkidle', timeout=min(config.network_idle_ms, remaining_ms()) or 1)
+        except Exception:
+            pass  # long-polling and ad beacons often keep the network busy
+        if remaining_ms():
+            result = await page.evaluate(QUIET_PERIOD_SCRIPT, {'quietMs': config.quiet_ms, 'maxMs': remaining_ms()})
+            settled = bool(result and result.get('settled'))
+    except Exception as e:
+        log.warning(f"Readiness wait interrupted: {e}")
+
+    return _finish(url, started, settled)
+
+
+def _finish(url, started, settled):
+    elapsed = time.monotonic() - started
+    _record(url, elapsed, settled)
+    log.info("Page ready", extra={'stage': 'readiness', 'duration_ms': round(elapsed * 1000, 1), 'settled': settled})
+    return elapsed
+
+
+def _record(url, elapsed, settled):
+    host = (urlsplit(url).hostname or '').lower()
+    with _stats_lock:
+        entry = _stats.get(host)
+        if entry is None:
+            entry = _stats[host] = {'pages': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'capped': 0}
+            while len(_stats) > MAX_HOSTS:
+                _stats.popitem(last=False)
+        else:
+            _stats.move_to_end(host)
+        entry['pages'] += 1
+        entry['total_seconds'] += elapsed
+        entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+        entry['last_seconds'] = elapsed
+        if not settled:
+            entry['capped'] += 1
+
+
+def readiness_stats():
+    """Per-domain readiness timings: pages, average/max/last seconds and how many hit the cap.
+
+    Only the MAX_HOSTS most recently fetched hosts are kept.
+    """
+    with _stats_lock:
+        return {
+            host: dict(entry, avg_seconds=round(entry['total_seconds'] / entry['pages'], 3))
+            for host, entry in _stats.items()
+        }
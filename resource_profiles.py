@@ -0,0 +1,133 @@
+import os
+from urllib.parse import urlsplit
+
+
+# Analytics/ad hosts aborted under every profile (matched on host suffix)
+TRACKER_DOMAINS = frozenset({
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'googlesyndication.com', 'googleadservices.com', 'amazon-adsystem.com',
+    'scorecardresearch.com', 'quantserve.com', 'outbrain.com', 'taboola.com',
+    'chartbeat.com', 'hotjar.com', 'criteo.com', 'adnxs.com', 'moatads.com',
+})
+
+# Resource types aborted by each profile; all we keep is page.content()
+PROFILES = {
+    'text': frozenset({
+        'image', 'media', 'font', 'stylesheet', 'script', 'texttrack',
+        'manifest', 'websocket', 'eventsource', 'other'
+    }),
+    'scripts': frozenset({'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'}),
+    'full': frozenset(),
+}
+
+# Profiles that additionally abort scripts served from other sites
+BLOCK_THIRD_PARTY_SCRIPTS = frozenset({'scripts'})
+
+# Rough transfer size per aborted request, used for the bytes-saved estimate
+ESTIMATED_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 30_000,
+    'script': 80_000,
+    'xhr': 10_000,
+    'fetch': 10_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+DEFAULT_PROFILE = os.environ.get('BROWSER_RESOURCE_PROFILE', 'scripts')
+
+
+def _parse_overrides(value):
+    """'ndtv.com=full,example.org=text' -> {'ndtv.com': 'full', 'example.org': 'text'}"""
+    overrides = {}
+    for item in value.split(','):
+        host, _, profile = item.partition('=')
+        if host.strip() and profile.strip() in PROFILES:
+            overrides[host.strip().lower()] = profile.strip()
+    return overrides
+
+
+PROFILE_OVERRIDES = _parse_overrides(os.environ.get('BROWSER_RESOURCE_PROFILES', ''))
+
+
+def _host_suffixes(host):
+    """'a.b.example.com' -> ['a.b.example.com', 'b.example.com', 'example.com', 'com']"""
+    labels = host.split('.')
+    return ['.'.join(labels[i:]) for i in range(len(labels))]
+
+
+def site_of(host):
+    """Approximate registrable domain, e.g. 'www.bbc.co.uk' -> 'bbc.co.uk'"""
+    labels = host.lower().split('.')
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ('co', 'com', 'org', 'net', 'gov', 'ac'):
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def is_tracker(host, path=''):
+    if any(suffix in TRACKER_DOMAINS for suffix in _host_suffixes(host)):
+        return True
+    # Facebook pixel lives on the main domain
+    return host.endswith('facebook.com') and path.startswith('/tr')
+
+
+def profile_for(url):
+    """Profile name for a page: per-domain override, else BROWSER_RESOURCE_PROFILE"""
+    host = (urlsplit(url).hostname or '').lower()
+    for suffix in _host_suffixes(host):
+        if suffix in PROFILE_OVERRIDES:
+            return PROFILE_OVERRIDES[suffix]
+    return DEFAULT_PROFILE if DEFAULT_PROFILE in PROFILES else 'scripts'
+
+
+class ResourceBlocker:
+    """page.route() handler that aborts requests the chosen profile doesn't need"""
+
+    def __init__(self, page_url, profile=None):
+        self.profile = profile or profile_for(page_url)
+        self.blocked_types = PROFILES[self.profile]
+        self.block_third_party_scripts = self.profile in BLOCK_THIRD_PARTY_SCRIPTS
+        self.site = site_of(urlsplit(page_url).hostname or '')
+        self.blocked = 0
+        self.allowed = 0
+        self.bytes_saved = 0
+
+    def should_block(self, resource_type, url):
+        if resource_type == 'document':
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        if is_tracker(host, parts.path):
+            return True
+        if self.block_third_party_scripts and resource_type == 'script':
+            return site_of(host) != self.site
+        return False
+
+    def _count(self, request):
+        """Decide for one request and record the outcome"""
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            self.bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+            return True
+        self.allowed += 1
+        return False
+
+    def __call__(self, route):
+        if self._count(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_async(self, route):
+        """The same handler for playwright.async_api pages"""
+        if self._count(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def summary(self):
+        return (f"profile '{self.profile}': blocked {self.blocked} of {self.blocked + self.allowed} "
+                f"requests, ~{self.bytes_saved // 1024} KB saved")
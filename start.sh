@@ -8,4 +8,4 @@ export PLAYWRIGHT_BROWSERS_PATH=/opt/render/project/.playwright
 export PYTHONUNBUFFERED=1
 
 # Start the application
-exec gunicorn --bind 0.0.0.0:$PORT --workers 1 --timeout 120 --worker-class sync app:app
+exec gunicorn --bind 0.0.0.0:$PORT --workers 1 --threads 8 --timeout 120 --worker-class gthread app:app
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import copy
+import uuid
+import queue
+import atexit
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+
+ROOT_LOGGER = 'readitnow'
+
+# Request id of the request being served; copied into worker threads by the executors
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key != 'request_id':
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _RequestQueueHandler(QueueHandler):
+    """Stamps the request id on the calling thread, then hands the record to the queue.
+
+    QueueHandler.prepare would fold the traceback into msg; here it is
+    formatted into exc_text instead so JsonFormatter still writes it as exc.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level=None):
+    """Route readitnow.* loggers through a non-blocking queue to JSON lines on stdout.
+
+    Worker threads only enqueue records; a single listener thread does the
+    writing, so a slow stdout never blocks a request. Idempotent.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    queue_handler = _RequestQueueHandler(log_queue)
+    queue_handler.setFormatter(JsonFormatter())
+    root.handlers = [queue_handler]
+    root.propagate = False
+
+
+def get_logger(name):
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def new_request_id(incoming=None):
+    """Bind a request id (the caller's, or a fresh one) to the current context"""
+    request_id = incoming or uuid.uuid4().hex[:16]
+    request_id_var.set(request_id)
+    return request_id
@@ -0,0 +1,296 @@
+import os
+import re
+import html
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from langchain_core.messages import HumanMessage
+
+from compaction import count_tokens, truncate_tokens
+from structured_log import get_logger
+
+log = get_logger('summarizer')
+
+
+# Articles up to this many tokens are summarized in one call; longer ones are map-reduced
+SINGLE_CALL_TOKENS = int(os.environ.get('SUMMARY_SINGLE_CALL_TOKENS', '2500'))
+CHUNK_TOKENS = int(os.environ.get('SUMMARY_CHUNK_TOKENS', '1500'))
+# Upper bound on map calls per article; chunks grow instead of multiplying past it
+MAX_CHUNKS = int(os.environ.get('SUMMARY_MAX_CHUNKS', '12'))
+# Article text map-reduce covers without growing chunks past CHUNK_TOKENS
+MAP_REDUCE_TOKENS = MAX_CHUNKS * CHUNK_TOKENS
+# Map calls one article may have in flight (PooledLLM still caps the process total)
+MAP_CONCURRENCY = int(os.environ.get('SUMMARY_MAP_CONCURRENCY', '3'))
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Link and image URLs the rendered summary may keep; anything else (javascript:, data:) becomes '#'
+SAFE_URL_SCHEMES = ('http', 'https', 'mailto')
+_URL_SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+
+def build_summary_prompt(title, content):
+    """Prompt asking for the 1-minute markdown summary"""
+    return f"""Create a concise 1-minute summary of this article that captures the key points:
+
+        Title: {title}
+        Content: {content}
+
+        Instructions:
+        - Write 2-3 short paragraphs that someone can read in about 1 minute
+        - Use **bold** for important terms and concepts
+        - Use clear, engaging language
+        - Focus on the most important information
+        - Make it informative and easy to understand
+
+        IMPORTANT: Write your response directly in markdown format. Do NOT wrap it in code blocks or use ```markdown tags.
+
+        Example format:
+        **Key Point**: Description of the main issue or event.
+
+        Second paragraph with more details and **important terms** highlighted.
+
+        Final paragraph with conclusions or implications.
+        """
+
+
+def clean_summary(text):
+    """Strip <think> blocks and any code block wrapping the model added"""
+    summary_raw = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+
+    # Clean up any code block wrapping that AI might add
+    if '```markdown' in summary_raw:
+        summary_raw = summary_raw.split('```markdown')[1].split('```')[0].strip()
+    elif summary_raw.startswith('```') and summary_raw.endswith('```'):
+        summary_raw = summary_raw[3:-3].strip()
+
+    return summary_raw
+
+
+class ThinkFilter:
+    """Removes <think>...</think> sections from a token stream as it arrives.
+
+    Tags may be split across chunks, so a possible partial tag at the end of
+    a chunk is held back until the next one decides it.
+    """
+
+    OPEN = '<think>'
+    CLOSE = '</think>'
+
+    def __init__(self):
+        self._buffer = ''
+        self._thinking = False
+
+    def feed(self, chunk):
+        """Visible text released by this chunk (may be empty)"""
+        self._buffer += chunk
+        visible = []
+        while self._buffer:
+            tag = self.CLOSE if self._thinking else self.OPEN
+            index = self._buffer.find(tag)
+            if index != -1:
+                if not self._thinking:
+                    visible.append(self._buffer[:index])
+                self._buffer = self._buffer[index + len(tag):]
+                self._thinking = not self._thinking
+                continue
+
+            # Keep a tail that could still grow into the tag
+            keep = 0
+            for size in range(min(len(tag) - 1, len(self._buffer)), 0, -1):
+                if tag.startswith(self._buffer[-size:]):
+                    keep = size
+                    break
+            if not self._thinking:
+                visible.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            break
+        return ''.join(visible)
+
+    def flush(self):
+        """Whatever visible text is still held back at the end of the stream"""
+        rest = '' if self._thinking else self._buffer
+        self._buffer = ''
+        return rest
+
+
+def _split_long_paragraph(paragraph, budget):
+    """Sentence-boundary pieces of a paragraph that alone exceeds the budget"""
+    pieces, current = [], ''
+    for sentence in SENTENCE_END.split(paragraph):
+        while count_tokens(sentence) > budget:  # one enormous "sentence": hard cut
+            if current:
+                pieces.append(current)
+                current = ''
+            head = truncate_tokens(sentence, budget) or sentence[:budget * 4]
+            pieces.append(head)
+            sentence = sentence[len(head):].lstrip()
+        if current and count_tokens(current) + count_tokens(sentence) > budget:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f'{current} {sentence}' if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_content(content, budget=CHUNK_TOKENS, max_chunks=MAX_CHUNKS):
+    """Split article text at paragraph boundaries into chunks of at most ~budget tokens"""
+    budget = max(budget, count_tokens(content) // max_chunks + 1)
+    paragraphs = []
+    for paragraph in re.split(r'\n\s*\n', content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) > budget:
+            paragraphs.extend(_split_long_paragraph(paragraph, budget))
+        else:
+            paragraphs.append(paragraph)
+
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph)
+        if current and current_tokens + tokens > budget:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def build_chunk_prompt(title, chunk, index, total):
+    """Map step: condense one part of a long article into notes"""
+    return f"""You are reading part {index} of {total} of the article "{title}".
+
+        Write concise notes on this part: the key facts, events, names, numbers and claims.
+        Use short bullet points in plain markdown. Do not add an introduction or conclusion.
+
+        Part {index}:
+        {chunk}
+        """
+
+
+def build_reduce_prompt(title, notes):
+    """Reduce step: the usual 1-minute summary, written from the per-part notes"""
+    combined = '\n\n'.join(f'Part {index}:\n{note}' for index, note in enumerate(notes, 1))
+    return build_summary_prompt(title, f"(Notes taken from each part of a long article, in order)\n\n{combined}")
+
+
+def summarize_chunks(llm, title, chunks, cache=None, concurrency=MAP_CONCURRENCY):
+    """Map step: notes for every chunk, cached by chunk hash, with bounded parallel calls"""
+    notes = [cache.get_chunk(chunk) if cache else None for chunk in chunks]
+    missing = [index for index, note in enumerate(notes) if note is None]
+    log.info("Map-reduce summary", extra={'chunks': len(chunks), 'cached_chunks': len(chunks) - len(missing)})
+
+    def summarize_one(index):
+        prompt = build_chunk_prompt(title, chunks[index], index + 1, len(chunks))
+        note = clean_summary(llm.invoke([HumanMessage(content=prompt)]).content)
+        if cache:
+            cache.put_chunk(chunks[index], note)
+        return note
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(missing)), thread_name_prefix='summary-map') as pool:
+            # Copy the request's context so map-call logs keep its request id
+            futures = {index: pool.submit(contextvars.copy_context().run, summarize_one, index) for index in missing}
+            for index, future in futures.items():
+                notes[index] = future.result()
+    return notes
+
+
+def summarize(llm, title, content, on_delta=None, cache=None):
+    """Generate the 1-minute summary markdown.
+
+    Short articles go to the model in a single call. Longer ones are split
+    into token-budgeted chunks, summarized in parallel (map) and combined by
+    one final call (reduce); cache, when given, stores chunk notes by hash.
+    With on_delta the final response is streamed and on_delta is called with
+    each piece of visible text (think blocks removed) as it arrives.
+    """
+    if count_tokens(content) <= SINGLE_CALL_TOKENS:
+        prompt = build_summary_prompt(title, content)
+    else:
+        notes = summarize_chunks(llm, title, chunk_content(content), cache=cache)
+        prompt = build_reduce_prompt(title, notes)
+    messages = [HumanMessage(content=prompt)]
+
+    if on_delta is None:
+        return clean_summary(llm.invoke(messages).content)
+
+    think_filter = ThinkFilter()
+    parts = []
+    for chunk in llm.stream(messages):
+        visible = think_filter.feed(chunk.content or '')
+        if visible:
+            parts.append(visible)
+            on_delta(visible)
+    rest = think_filter.flush()
+    if rest:
+        parts.append(rest)
+        on_delta(rest)
+
+    return clean_summary(''.join(parts))
+
+
+def _is_safe_url(url):
+    # Browsers decode entities and ignore whitespace and control characters inside the scheme
+    scheme = _URL_SCHEME.match(re.sub(r'[\x00-\x20]', '', html.unescape(url)))
+    return not scheme or scheme.group(1).lower() in SAFE_URL_SCHEMES
+
+
+class _SafeUrls(Treeprocessor):
+    """Points links and images with a non-http(s)/mailto URL at '#'"""
+
+    def run(self, root):
+        for element in root.iter():
+            for attr in ('href', 'src'):
+                if element.get(attr) is not None and not _is_safe_url(element.get(attr)):
+                    element.set(attr, '#')
+
+
+class _UntrustedMarkdown(Extension):
+    """Markdown for model output: raw HTML is shown as text and only safe URLs are kept"""
+
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block')
+        md.inlinePatterns.deregister('html')
+        # After every other tree step, so the URLs checked are the ones written out
+        md.treeprocessors.register(_SafeUrls(md), 'safe_urls', -10)
+
+
+def process_markdown_to_html(text):
+    """Convert markdown text to HTML for proper display.
+
+    The summary is model output steered by the article it read, so it is
+    untrusted: raw HTML in it is escaped, not passed through, and only
+    http(s)/mailto link and image URLs survive.
+    """
+    try:
+        # Convert markdown to HTML with extensions
+        return markdown.markdown(text, extensions=['nl2br', 'fenced_code', 'tables', _UntrustedMarkdown()])
+    except Exception as e:
+        log.warning(f"Markdown processing failed: {e}")
+        # Enhanced fallback: basic formatting
+        text = html.escape(text, quote=False)
+        text = text.replace('**', '<strong>').replace('**', '</strong>')
+        text = text.replace('*', '<em>').replace('*', '</em>')
+        
+        # Handle headers
+        text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
+        text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
+        text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
+        
+        # Handle line breaks and paragraphs
+        text = text.replace('\n\n', '</p><p>')
+        text = f'<p>{text}</p>'
+        
+        # Clean up empty paragraphs
+        text = re.sub(r'<p>\s*</p>', '', text)
+        
+        return text
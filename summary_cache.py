@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Query params that only identify the click, never the article
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gclsrc', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'referrer', 'cmpid', 'ito', 'spm', '_ga', '_gl', 'ocid'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hsa_')
+
+
+def normalize_url(url):
+    """Canonical form of an article URL used as the primary cache key"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def content_hash(text):
+    """Hash of the extracted article text, insensitive to whitespace and case"""
+    normalized = ' '.join(str(text).split()).lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """TTL + LRU summary cache keyed on normalized URL and article text hash.
+
+    Entries live in a size-bounded in-memory LRU; when db_path is set they are
+    also written to SQLite so they survive gunicorn restarts.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS summaries '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+            self._db.execute('DELETE FROM summaries WHERE expires < ?', (time.time(),))
+            self._db.commit()
+
+    def get_by_url(self, url):
+        # A URL miss is only counted once the content lookup misses too
+        return self._get(f'url:{normalize_url(url)}', count_miss=False)
+
+    def get_by_content(self, text):
+        return self._get(f'content:{content_hash(text)}')
+
+    def put(self, url, text, value):
+        """Store a summary under both its URL key and its content key"""
+        expires = time.time() + self.ttl
+        keys = [f'url:{normalize_url(url)}', f'content:{content_hash(text)}']
+        with self._lock:
+            for key in keys:
+                self._remember(key, expires, value)
+            if self._db is not None:
+                payload = json.dumps(value)
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO summaries (key, value, expires) VALUES (?, ?, ?)',
+                    [(key, payload, expires) for key in keys]
+                )
+                self._db.commit()
+
+    def alias(self, url, value):
+        """Point another URL at an entry found through its content hash"""
+        expires = time.time() + self.ttl
+        key = f'url:{normalize_url(url)}'
+        with self._lock:
+            self._remember(key, expires, value)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO summaries (key, value, expires) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), expires)
+                )
+                self._db.commit()
+
+    def get_chunk(self, text):
+        """Cached map-step summary of one article chunk (not counted in the hit ratio)"""
+        return self._get(f'chunk:{content_hash(text)}', count_miss=False, count_hit=False)
+
+    def put_chunk(self, text, summary):
+        expires = time.time() + self.ttl
+        key = f'chunk:{content_hash(text)}'
+        with self._lock:
+            self._remember(key, expires, summary)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO summaries (key, value, expires) VALUES (?, ?, ?)',
+                    (key, json.dumps(summary), expires)
+                )
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'disk': self._db is not None,
+            }
+
+    def _get(self, key, count_miss=True, count_hit=True):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += count_hit
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires FROM summaries WHERE key = ? AND expires > ?', (key, now)
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += count_hit
+                    return value
+
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def _remember(self, key, expires, value):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Process-wide summary cache configured from the environment"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SummaryCache(
+                    max_entries=int(os.environ.get('SUMMARY_CACHE_SIZE', '256')),
+                    ttl=int(os.environ.get('SUMMARY_CACHE_TTL', '3600')),
+                    db_path=os.environ.get('SUMMARY_CACHE_DB') or None
+                )
+    return _cache
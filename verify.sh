@@ -51,6 +51,6 @@ echo "🎉 Deployment verification complete!"
 echo ""
 echo "🚀 To start the application:"
 echo "   source venv/bin/activate"
-echo "   gunicorn --bind 0.0.0.0:8000 --workers 1 --timeout 120 app:app"
+echo "   gunicorn --bind 0.0.0.0:8000 --workers 1 --threads 8 --timeout 120 --worker-class gthread app:app"
 echo ""
 echo "🌐 Your app will be available at: https://your-nest-id.nest.hackclub.com"